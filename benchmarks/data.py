@@ -0,0 +1,116 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from config.settings import (
+    CATEGORY_PIPELINES, HOT_STATUS_IDS, NOT_QUALIFIED_STATUS_IDS,
+    HOT_FIELD_NAME, QUALIFIED_FIELD_NAME, CUSTOM_KEYS
+)
+
+FIRST_NAMES = ["Олена", "Ігор", "Марія", "Андрій", "Наталія", "Олег", "Ірина", "Дмитро"]
+LAST_NAMES = ["Коваленко", "Шевченко", "Бондаренко", "Ткаченко", "Кравченко", "Мельник"]
+
+
+def generate_dataset(
+    date: str,
+    n_cards: int,
+    n_calls: int,
+    n_managers: int = 12,
+    new_share: float = 0.3,
+    webhook_share: float = 0.5,
+    seed: int = 42
+) -> Dict[str, Any]:
+    """
+    Generate a synthetic KeyCRM day: cards, calls on the given day and webhook leads.
+    Args:
+        date (str): Day of the calls in 'YYYY-MM-DD' format (Kyiv time).
+        n_cards (int): Number of cards.
+        n_calls (int): Number of calls on the day.
+        n_managers (int): Number of managers.
+        new_share (float): Share of cards created on the day.
+        webhook_share (float): Share of the day's new cards returned by the webhook.
+        seed (int): Random seed (the same arguments give the same data).
+    Returns:
+        dict: {"cards": {id: card}, "calls": [call], "webhook": [{"card_id"}],
+            "pipelines": {id: title}, "statuses": {pipeline_id: [status]}}.
+    """
+    rng = random.Random(seed)
+    day = datetime.strptime(date, "%Y-%m-%d")
+    pipeline_ids = sorted(
+        pipeline_id for pipeline_ids in CATEGORY_PIPELINES.values() for pipeline_id in pipeline_ids
+    )
+    status_ids = sorted(HOT_STATUS_IDS | NOT_QUALIFIED_STATUS_IDS | {1001, 1002, 1003, 1004})
+    managers = [
+        {
+            "id": manager_id,
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": f"{rng.choice(LAST_NAMES)}-{manager_id}"
+        }
+        for manager_id in range(1, n_managers + 1)
+    ]
+    for manager in managers:
+        manager["full_name"] = f"{manager['first_name']} {manager['last_name']}"
+
+    cards: Dict[int, Dict[str, Any]] = {}
+    new_ids: List[int] = []
+    for card_id in range(1, n_cards + 1):
+        is_new = rng.random() < new_share
+        if is_new:
+            # Kept within the Kyiv day whatever the DST offset
+            created = day + timedelta(seconds=rng.randint(0, 20 * 3600))
+            new_ids.append(card_id)
+        else:
+            created = day - timedelta(days=rng.randint(1, 90), seconds=rng.randint(0, 86399))
+        manager = rng.choice(managers) if rng.random() < 0.95 else None
+        status_id = rng.choice(status_ids)
+        cards[card_id] = {
+            "id": card_id,
+            "title": f"Lead {card_id}",
+            "pipeline_id": rng.choice(pipeline_ids),
+            "status_id": status_id,
+            "manager_id": manager["id"] if manager else None,
+            "manager": manager,
+            "contact": {"full_name": f"Contact {card_id}", "phone": f"+380{rng.randint(500000000, 999999999)}"},
+            "status": {"id": status_id, "name": f"Status {status_id}"},
+            "created_at": created.strftime("%Y-%m-%dT%H:%M:%S.000000Z"),
+            "updated_at": created.strftime("%Y-%m-%d %H:%M:%S"),
+            "custom_fields": [
+                {"uuid": "LD_1001", "name": HOT_FIELD_NAME, "value": rng.random() < 0.4},
+                {"uuid": "LD_1002", "name": QUALIFIED_FIELD_NAME, "value": rng.random() < 0.6},
+                *(
+                    {"uuid": f"LD_{2000 + index}", "name": key, "value": rng.random() < 0.1}
+                    for index, key in enumerate(CUSTOM_KEYS)
+                )
+            ]
+        }
+
+    calls: List[Dict[str, Any]] = []
+    for call_id in range(1, n_calls + 1):
+        created = day + timedelta(seconds=rng.randint(0, 86399))
+        lead_id = rng.randint(1, n_cards) if n_cards else None
+        calls.append({
+            "id": call_id,
+            # Some calls carry the lead ID as a string, as KeyCRM does
+            "lead_id": str(lead_id) if lead_id and rng.random() < 0.1 else lead_id,
+            "created_at": created.strftime("%Y-%m-%d %H:%M:%S"),
+            "duration": rng.randint(0, 900)
+        })
+        # Cards touched by a call are updated that day
+        if lead_id:
+            cards[lead_id]["updated_at"] = max(cards[lead_id]["updated_at"], calls[-1]["created_at"])
+    calls.sort(key=lambda call: call["created_at"])
+
+    webhook = [{"card_id": card_id} for card_id in new_ids if rng.random() < webhook_share]
+    statuses = {
+        pipeline_id: [
+            {"id": status_id, "name": f"Status {status_id}", "pipeline_id": pipeline_id}
+            for status_id in status_ids
+        ]
+        for pipeline_id in pipeline_ids
+    }
+    return {
+        "cards": cards,
+        "calls": calls,
+        "webhook": webhook,
+        "pipelines": {pipeline_id: f"Pipeline {pipeline_id}" for pipeline_id in pipeline_ids},
+        "statuses": statuses
+    }
@@ -0,0 +1,272 @@
+"""
+Offline benchmarks of the refresh pipeline against a local KeyCRM stub server.
+
+Usage (from the repository root):
+    python -m benchmarks.run                                 # small and medium, compared with baselines
+    python -m benchmarks.run --scenario large                # 100k cards and calls
+    python -m benchmarks.run --scenario small --save         # record new baselines on this machine
+    python -m benchmarks.run --cards 5000 --calls 20000 --latency 0.05 --error-rate 0.01 --name flaky
+
+Timings depend on the machine: record baselines with --save on the machine that runs
+the comparison. The exit code is 1 if a metric regressed beyond the tolerance.
+"""
+import argparse
+import copy
+import json
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.data import generate_dataset
+from benchmarks.stub_server import StubKeyCRM
+from src.api.client import ApiClient
+from src.api.rate_limit import TokenBucket
+from src.core.pipeline import compute_all_data, current_kyiv_date
+from src.utils.analytics import add_card_to_dict, build_manager_category_dict
+from src.utils.cards import Card
+from src.utils.metrics import metrics
+
+BASELINES_PATH = Path(__file__).resolve().parent / "baselines.json"
+
+SCENARIOS: Dict[str, Dict[str, int]] = {
+    "small": {"cards": 2000, "calls": 5000},
+    "medium": {"cards": 20000, "calls": 50000},
+    "large": {"cards": 100000, "calls": 100000}
+}
+
+# Metrics where a higher value is better; all others are better when lower
+HIGHER_IS_BETTER = {"parse_cards_per_s", "analytics_cards_per_s", "fold_cards_per_s"}
+
+# Metrics that must not change at all (the same dataset must give the same analytics)
+EXACT = {"cards", "calls", "cards_counted"}
+
+
+def make_client(stub: StubKeyCRM, rate_per_minute: float, burst: int) -> ApiClient:
+    """
+    Create an API client for the stub with its own rate limit and no card cache, so
+    runs do not share rate budgets or cached cards.
+    """
+    client = ApiClient(api_key=f"benchmark-{uuid.uuid4().hex}", base_url=stub.url)
+    client.rate_limiter = TokenBucket(rate_per_minute, burst)
+    client.card_cache = None
+    return client
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns (result, seconds) of one call.
+    """
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def best_of(repeat: int, function, *args, **kwargs):
+    """
+    Returns (result, seconds) of the fastest of several calls, which is less noisy
+    for short measurements.
+    """
+    runs = [timed(function, *args, **kwargs) for _ in range(repeat)]
+    return min(runs, key=lambda run: run[1])
+
+
+def add_new_calls(dataset: Dict[str, Any], date: str, count: int, seed: int) -> None:
+    """
+    Append calls made at the end of the day (as if they arrived after a refresh)
+    and mark their cards as updated.
+    """
+    rng = random.Random(seed)
+    next_id = len(dataset["calls"]) + 1
+    for call_id in range(next_id, next_id + count):
+        lead_id = rng.randint(1, len(dataset["cards"]))
+        created_at = f"{date} 23:59:59"
+        dataset["calls"].append({"id": call_id, "lead_id": lead_id, "created_at": created_at, "duration": 60})
+        dataset["cards"][lead_id]["updated_at"] = created_at
+
+
+def run_refreshes(
+    dataset: Dict[str, Any],
+    date: str,
+    options: argparse.Namespace,
+    measure_memory: bool
+) -> Dict[str, Any]:
+    """
+    Run a full refresh and an incremental refresh against a fresh stub server.
+    """
+    stub = StubKeyCRM(
+        dataset,
+        latency=options.latency,
+        rate_limit_per_minute=options.server_rate_limit,
+        error_rate=options.error_rate
+    ).start()
+    try:
+        client = make_client(stub, options.client_rate, options.client_burst)
+        webhook_url = f"{stub.url}/webhook?run={uuid.uuid4().hex}"
+        metrics.reset()
+        if measure_memory:
+            tracemalloc.start()
+        result, full_seconds = timed(compute_all_data, client, webhook_url)
+        peak_bytes = tracemalloc.get_traced_memory()[1] if measure_memory else None
+        if measure_memory:
+            tracemalloc.stop()
+        full_requests = sum(stub.requests.values())
+        full_by_endpoint = dict(stub.requests)
+        full_bytes = stub.bytes_sent
+        stages = dict(metrics.snapshot()["stages"])
+
+        stub.reset_counts()
+        add_new_calls(dataset, date, max(1, len(dataset["calls"]) // 100), options.seed)
+        stub.data_changed()
+        _, incremental_seconds = timed(compute_all_data, client, webhook_url, result)
+        return {
+            "full_refresh_s": full_seconds,
+            "full_requests": full_requests,
+            "full_requests_by_endpoint": full_by_endpoint,
+            "full_mb_transferred": full_bytes / 2 ** 20,
+            "peak_mb": peak_bytes / 2 ** 20 if peak_bytes is not None else None,
+            "incremental_s": incremental_seconds,
+            "incremental_requests": sum(stub.requests.values()),
+            "cards_counted": result["all_data"]["count"],
+            "stages": stages
+        }
+    finally:
+        stub.stop()
+
+
+def run_analytics(dataset: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Measure card parsing, vectorized analytics and the incremental fold (best of 3).
+    """
+    raw_cards = list(dataset["cards"].values())
+    cards, parse_seconds = best_of(3, lambda: [Card.from_api(card) for card in raw_cards])
+    split = len(cards) // 2
+    grouped = {"Нові": cards[:split], "Попередні": cards[split:]}
+    _, analytics_seconds = best_of(3, build_manager_category_dict, grouped)
+
+    def fold() -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for state, state_cards in grouped.items():
+            for card in state_cards:
+                add_card_to_dict(result, state, card)
+        return result
+
+    _, fold_seconds = best_of(3, fold)
+    return {
+        "parse_cards_per_s": len(cards) / parse_seconds if parse_seconds else 0.0,
+        "analytics_cards_per_s": len(cards) / analytics_seconds if analytics_seconds else 0.0,
+        "fold_cards_per_s": len(cards) / fold_seconds if fold_seconds else 0.0
+    }
+
+
+def run_scenario(name: str, n_cards: int, n_calls: int, options: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run all measurements for one dataset size.
+    """
+    date = current_kyiv_date()
+    dataset, generate_seconds = timed(generate_dataset, date, n_cards, n_calls, seed=options.seed)
+    print(f"[{name}] generated {n_cards} cards and {n_calls} calls in {generate_seconds:.1f}s", file=sys.stderr)
+
+    # Timing and memory are measured in separate runs: tracemalloc slows allocations down
+    timing = run_refreshes(copy.deepcopy(dataset), date, options, measure_memory=False)
+    if not options.no_memory:
+        timing["peak_mb"] = run_refreshes(copy.deepcopy(dataset), date, options, measure_memory=True)["peak_mb"]
+    return {"cards": n_cards, "calls": n_calls, **timing, **run_analytics(dataset)}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compare one scenario with its baseline.
+    Returns:
+        list: Report lines; lines of regressed metrics start with 'REGRESSION'.
+    """
+    lines: List[str] = []
+    for metric, base in baseline.items():
+        value = results.get(metric)
+        if metric in EXACT:
+            if value != base:
+                lines.append(f"REGRESSION {metric:<24} {base} -> {value} (must not change)")
+            continue
+        if not isinstance(base, (int, float)) or not isinstance(value, (int, float)) or not base:
+            continue
+        change = (value - base) / base
+        worse = -change if metric in HIGHER_IS_BETTER else change
+        marker = "REGRESSION" if worse > tolerance else "ok"
+        lines.append(f"{marker:<10} {metric:<24} {base:>14.3f} -> {value:>14.3f} ({change:+.1%})")
+    return lines
+
+
+def load_baselines() -> Dict[str, Any]:
+    if BASELINES_PATH.exists():
+        return json.loads(BASELINES_PATH.read_text(encoding="utf-8"))
+    return {}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline KeyCRM refresh benchmarks")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="Dataset size (repeatable; default: small and medium)")
+    parser.add_argument("--cards", type=int, help="Custom number of cards (with --calls)")
+    parser.add_argument("--calls", type=int, help="Custom number of calls (with --cards)")
+    parser.add_argument("--name", help="Name of the custom scenario in baselines (default: custom)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean server latency per request (seconds)")
+    parser.add_argument("--server-rate-limit", type=float, help="Server rate limit (requests per minute, 429 above)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 5xx")
+    parser.add_argument("--client-rate", type=float, default=1e6, help="Client rate limit (requests per minute)")
+    parser.add_argument("--client-burst", type=int, default=1000, help="Client rate limit burst")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the dataset and error injection")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak memory run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baselines")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    options = parser.parse_args(argv)
+
+    if (options.cards is None) != (options.calls is None):
+        parser.error("--cards and --calls go together")
+    runs: Dict[str, Dict[str, int]] = {}
+    if options.cards is not None:
+        runs[options.name or "custom"] = {"cards": options.cards, "calls": options.calls}
+    for scenario in options.scenario or ([] if runs else ["small", "medium"]):
+        runs[scenario] = SCENARIOS[scenario]
+    # Injected latency or failures are not comparable with the plain baselines
+    injected = options.latency or options.error_rate or options.server_rate_limit
+    results = {
+        (f"{name}-injected" if injected and name in SCENARIOS else name): run_scenario(name, size["cards"], size["calls"], options)
+        for name, size in runs.items()
+    }
+
+    baselines = load_baselines()
+    regressed = False
+    if options.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    for name, result in results.items():
+        print(f"\n=== {name}: {result['cards']} cards, {result['calls']} calls ===")
+        print(f"full refresh     {result['full_refresh_s']:.2f}s, {result['full_requests']} requests "
+              f"({result['full_mb_transferred']:.1f} MB), peak memory "
+              + (f"{result['peak_mb']:.1f} MB" if result['peak_mb'] is not None else "not measured"))
+        print(f"incremental      {result['incremental_s']:.2f}s, {result['incremental_requests']} requests")
+        print(f"throughput       parse {result['parse_cards_per_s']:,.0f}, analytics {result['analytics_cards_per_s']:,.0f}, "
+              f"fold {result['fold_cards_per_s']:,.0f} cards/s")
+        print("stages           " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in result['stages'].items()))
+        print("requests         " + ", ".join(f"{endpoint} {count}" for endpoint, count in sorted(result['full_requests_by_endpoint'].items())))
+        if name in baselines and not options.save:
+            lines = compare(result, baselines[name], options.tolerance)
+            regressed |= any(line.startswith("REGRESSION") for line in lines)
+            print("\n".join(lines))
+
+    if options.save:
+        for name, result in results.items():
+            baselines[name] = {
+                key: round(value, 4) for key, value in result.items()
+                if isinstance(value, (int, float))
+            }
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"\nBaselines saved to {BASELINES_PATH}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
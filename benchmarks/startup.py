@@ -0,0 +1,109 @@
+"""
+Cold start budget check of the Streamlit app.
+
+Usage (from the repository root):
+    python -m benchmarks.startup                   # 3 cold runs, 1.0s budget
+    python -m benchmarks.startup --budget 0.5 --runs 5
+
+Each run starts a fresh interpreter, imports Streamlit (already loaded by a running
+server) and then times the first script run of src/app.py with no data yet, as on a
+freshly started replica: metadata loading is enabled with an empty cache directory,
+against a local KeyCRM stub server (with the default client rate limit). Only the
+prefetch scheduler is disabled. The exit code is 1 if the median run exceeds the
+budget or if a heavy module was imported by the first page view.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.data import generate_dataset
+from benchmarks.stub_server import StubKeyCRM
+
+APP_PATH = Path(__file__).resolve().parent.parent / "src" / "app.py"
+
+# Modules the first page view must not import (they are loaded when data is rendered)
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "plotly", "matplotlib")
+
+PROBE = """
+import json, sys, time
+import streamlit
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+app = AppTest.from_file(sys.argv[1]).run(timeout=60)
+seconds = time.perf_counter() - started
+print(json.dumps({
+    "seconds": seconds,
+    "exception": [str(exception.message) for exception in app.exception],
+    "modules": [name for name in sys.argv[2:] if name in sys.modules]
+}))
+"""
+
+
+def cold_run(stub: StubKeyCRM) -> Dict[str, Any]:
+    """
+    Time the first app run in a fresh interpreter with an empty cache directory.
+    Args:
+        stub (StubKeyCRM): Running stub server used as the KeyCRM API.
+    Returns:
+        dict: {"seconds", "exception": app exceptions, "modules": heavy modules imported}.
+    """
+    with tempfile.TemporaryDirectory(prefix="keycrm-startup-") as cache_dir:
+        env = dict(
+            os.environ,
+            KEYCRM_API_BASE_URL=stub.url,
+            KEYCRM_CACHE_DIR=cache_dir,
+            KEYCRM_PREFETCH="0",
+            KEYCRM_METRICS_PORT="0"
+        )
+        env.pop("KEYCRM_METADATA", None)
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE, str(APP_PATH), *HEAVY_MODULES],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cold start budget check of the Streamlit app")
+    parser.add_argument("--budget", type=float, default=1.0, help="Allowed median first run time (seconds)")
+    parser.add_argument("--runs", type=int, default=3, help="Number of cold runs")
+    options = parser.parse_args(argv)
+
+    stub = StubKeyCRM(generate_dataset("2026-01-15", 100, 100), latency=0.05).start()
+    try:
+        runs = [cold_run(stub) for _ in range(options.runs)]
+        metadata_requests = stub.requests["/pipelines"] + stub.requests["/pipelines/{id}/statuses"]
+    finally:
+        stub.stop()
+    median = statistics.median(run["seconds"] for run in runs)
+    modules = sorted({name for run in runs for name in run["modules"]})
+    exceptions = [message for run in runs for message in run["exception"]]
+    print("first run        " + ", ".join(f"{run['seconds']:.3f}s" for run in runs)
+          + f" (median {median:.3f}s, budget {options.budget:.3f}s)")
+    print("heavy modules    " + (", ".join(modules) if modules else "none"))
+    print(f"metadata         {metadata_requests} requests to the stub (made in the background)")
+
+    failed = False
+    if exceptions:
+        print("FAILED           app raised: " + "; ".join(exceptions))
+        failed = True
+    if median > options.budget:
+        print("FAILED           median first run is over the budget")
+        failed = True
+    if modules:
+        print("FAILED           heavy modules imported by the first page view")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
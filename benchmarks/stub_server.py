@@ -0,0 +1,223 @@
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from src.utils.metrics import endpoint_label
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients closing kept-alive connections (e.g. a probe process exiting) are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubKeyCRM:
+    """
+    Local HTTP server mimicking the KeyCRM endpoints used by the app (/calls,
+    /pipelines/cards, /pipelines/cards/{id}, /pipelines, /pipelines/{id}/statuses)
+    and the new leads webhook (/webhook), serving a generated dataset.
+    Latency, a server-side rate limit and random 5xx errors can be injected.
+    """
+    def __init__(
+        self,
+        dataset: Dict[str, Any],
+        latency: float = 0.0,
+        rate_limit_per_minute: Optional[float] = None,
+        error_rate: float = 0.0,
+        seed: int = 42
+    ) -> None:
+        """
+        Initialize stub server (call start() to serve).
+        Args:
+            dataset (dict): Data from benchmarks.data.generate_dataset.
+            latency (float): Mean added latency per request (seconds, ±50% jitter).
+            rate_limit_per_minute (float, optional): Requests per minute before 429 with
+                Retry-After is returned (None disables the limit).
+            error_rate (float): Share of requests answered with 500/502/503.
+            seed (int): Random seed of the latency and error injection.
+        """
+        self.cards: Dict[int, Dict[str, Any]] = dataset["cards"]
+        self.card_list: List[Dict[str, Any]] = list(self.cards.values())
+        self.calls: List[Dict[str, Any]] = dataset["calls"]
+        self.webhook: List[Dict[str, Any]] = dataset["webhook"]
+        self.pipelines: Dict[int, str] = dataset["pipelines"]
+        self.statuses: Dict[int, List[Dict[str, Any]]] = dataset["statuses"]
+        self.latency: float = latency
+        self.rate_limit_per_minute: Optional[float] = rate_limit_per_minute
+        self.error_rate: float = error_rate
+        self.random = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.bytes_sent: int = 0
+        self.lock = threading.Lock()
+        # Filtered and sorted lists by (endpoint, filters), so paging a large list stays O(page)
+        self.list_cache: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[Dict[str, Any]]] = {}
+        self.tokens: float = float(max(1, int(rate_limit_per_minute or 1) // 6))
+        self.tokens_updated_at: float = time.monotonic()
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base URL of the running server.
+        """
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> "StubKeyCRM":
+        """
+        Start serving on a free local port from a daemon thread.
+        """
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                status, body, headers = stub.handle(self.path, dict(self.headers))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.server = _StubServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, name="stub-keycrm", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the server.
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def data_changed(self) -> None:
+        """
+        Drop the filtered lists after the dataset was changed in place.
+        """
+        with self.lock:
+            self.card_list = list(self.cards.values())
+            self.list_cache.clear()
+
+    def reset_counts(self) -> None:
+        """
+        Reset the request and byte counters.
+        """
+        with self.lock:
+            self.requests.clear()
+            self.bytes_sent = 0
+
+    def _take_token(self) -> bool:
+        if not self.rate_limit_per_minute:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            rate = self.rate_limit_per_minute / 60.0
+            capacity = max(1.0, self.rate_limit_per_minute / 6)
+            self.tokens = min(capacity, self.tokens + (now - self.tokens_updated_at) * rate)
+            self.tokens_updated_at = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def handle(self, path: str, headers: Dict[str, str]) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        Answer one GET request.
+        Returns:
+            tuple: (status code, body, response headers).
+        """
+        parts = urlsplit(path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        endpoint = "/webhook" if parts.path.startswith("/webhook") else endpoint_label(parts.path)
+        with self.lock:
+            self.requests[endpoint] += 1
+            error_status = self.random.choice((500, 502, 503)) if self.random.random() < self.error_rate else None
+            delay = self.latency * self.random.uniform(0.5, 1.5)
+        if delay:
+            time.sleep(delay)
+        if not self._take_token():
+            return 429, b'{"message": "Too Many Attempts."}', {"Retry-After": "1", "Content-Type": "application/json"}
+        if error_status:
+            return error_status, b'{"message": "Server Error"}', {"Content-Type": "application/json"}
+
+        if endpoint == "/webhook":
+            status, payload, extra = self._webhook(headers)
+        else:
+            status, payload, extra = self._route(parts.path, query)
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        with self.lock:
+            self.bytes_sent += len(body)
+        return status, body, {"Content-Type": "application/json", **extra}
+
+    def _webhook(self, headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        etag = '"' + hashlib.sha1(json.dumps(self.webhook).encode()).hexdigest() + '"'
+        if headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        return 200, self.webhook, {"ETag": etag}
+
+    def _route(self, path: str, query: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        segments = [segment for segment in path.split("/") if segment]
+        if segments == ["calls"]:
+            return 200, self._page("calls", self.calls, query, "created_at"), {}
+        if segments == ["pipelines", "cards"]:
+            return 200, self._page("cards", self.card_list, query, "id"), {}
+        if len(segments) == 3 and segments[:2] == ["pipelines", "cards"] and segments[2].isdigit():
+            card = self.cards.get(int(segments[2]))
+            if card is None:
+                return 404, {"message": "Not found"}, {}
+            return 200, card, {}
+        if segments == ["pipelines"]:
+            pipelines = [{"id": pipeline_id, "title": title} for pipeline_id, title in self.pipelines.items()]
+            return 200, self._page("pipelines", pipelines, query, "id"), {}
+        if len(segments) == 3 and segments[0] == "pipelines" and segments[2] == "statuses" and segments[1].isdigit():
+            return 200, {"data": self.statuses.get(int(segments[1]), [])}, {}
+        return 404, {"message": "Not found"}, {}
+
+    def _page(
+        self,
+        name: str,
+        items: List[Dict[str, Any]],
+        query: Dict[str, str],
+        sort_key: str
+    ) -> Dict[str, Any]:
+        filters = tuple(sorted((key, value) for key, value in query.items() if key.startswith("filter[")))
+        cache_key = (name, filters)
+        with self.lock:
+            matching = self.list_cache.get(cache_key)
+        if matching is None:
+            predicates: List[Callable[[Dict[str, Any]], bool]] = []
+            for key, value in filters:
+                field = key[len("filter["):-1].replace("_between", "_at")
+                start, _, end = (part.strip() for part in value.partition(","))
+                predicates.append(
+                    lambda item, field=field, start=start, end=end:
+                        start <= str(item.get(field, "")).replace("T", " ")[:19] <= end
+                )
+            matching = sorted(
+                (item for item in items if all(predicate(item) for predicate in predicates)),
+                key=lambda item: item[sort_key]
+            )
+            with self.lock:
+                self.list_cache[cache_key] = matching
+        limit = min(int(query.get("limit", 15)), 50)
+        page = max(1, int(query.get("page", 1)))
+        return {
+            "total": len(matching),
+            "current_page": page,
+            "per_page": limit,
+            "data": matching[(page - 1) * limit:page * limit]
+        }
@@ -1,4 +1,6 @@
+import json
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,18 +9,157 @@ load_dotenv()
 # KeyCRM API key (set in .env)
 KEYCRM_API_KEY = os.getenv("KEYCRM_API_KEY", "your_api_key_here")
 
-# Base URL for all KeyCRM API requests
-API_BASE_URL = "https://openapi.keycrm.app/v1"
+# Base URL for all KeyCRM API requests (overridable, e.g. for a local stub server)
+API_BASE_URL = os.getenv("KEYCRM_API_BASE_URL", "https://openapi.keycrm.app/v1")
 
 # Endpoint for working with cards (pipelines/cards)
 API_CARDS_ENDPOINT = "/pipelines/cards"
 
+# Relations included with every card request (also part of the shared analytics cache key)
+CARD_INCLUDE = "custom_fields,manager"
+
+# Incremental refreshes list calls again from this many seconds before the last seen
+# call, so calls that become visible late are not missed (calls read again are skipped)
+CALLS_OVERLAP = 10 * 60
+
+# Maximum page size for KeyCRM list endpoints
+API_PAGE_LIMIT = 50
+
 # Timeout for HTTP requests (seconds)
 TIMEOUT = 30
 
+# Maximum number of concurrent requests when fetching cards by ID
+MAX_WORKERS = int(os.getenv("KEYCRM_MAX_WORKERS", "8"))
+
+# Several KeyCRM accounts as JSON, e.g.
+# {"Київ": {"api_key": "...", "webhook_url": "https://..."}, "Львів": {"api_key": "..."}}
+# ("base_url" and "webhook_url" are optional; without a webhook only the calls are used).
+# Each account is refreshed in its own worker process with its own rate limit and caches,
+# and the dashboard shows the combined analytics with a per-account breakdown.
+# Empty means the single account configured by KEYCRM_API_KEY.
+ACCOUNTS = json.loads(os.getenv("KEYCRM_ACCOUNTS", "{}"))
+
+# === Rate limiting and retries ===
+# Sustained request rate allowed by KeyCRM (requests per minute, per API key; 0 disables throttling)
+RATE_LIMIT_PER_MINUTE = float(os.getenv("KEYCRM_RATE_LIMIT_PER_MINUTE", "60"))
+
+# Number of requests that may be sent back to back before throttling kicks in
+RATE_LIMIT_BURST = int(os.getenv("KEYCRM_RATE_LIMIT_BURST", "10"))
+
+# Maximum number of retries for a failed request
+MAX_RETRIES = 5
+
+# Exponential backoff: base delay and upper bound (seconds)
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 30.0
+
+# HTTP status codes that are retried
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# === Card cache ===
+# Directory for the persistent on-disk cache
+CACHE_DIR = os.getenv("KEYCRM_CACHE_DIR", str(Path(__file__).resolve().parent.parent / ".cache"))
+
+# Enable the persistent card cache
+CARD_CACHE_ENABLED = os.getenv("KEYCRM_CARD_CACHE", "1") != "0"
+
+# Time after which a cached card is fetched again (seconds)
+CARD_CACHE_TTL = 12 * 60 * 60
+
+# Maximum number of cached cards (least recently used are evicted)
+CARD_CACHE_MAX_ENTRIES = 50000
+
+# === Shared analytics cache ===
+# Age after which shared analytics are refreshed again on request (seconds)
+ANALYTICS_MAX_AGE = int(os.getenv("KEYCRM_ANALYTICS_MAX_AGE", "300"))
+
+# === Pipeline metadata ===
+# Preload pipelines and statuses at startup to classify cards by name
+METADATA_ENABLED = os.getenv("KEYCRM_METADATA", "1") != "0"
+
+# Time after which cached pipelines and statuses are fetched again (seconds)
+METADATA_CACHE_TTL = int(os.getenv("KEYCRM_METADATA_TTL", str(6 * 60 * 60)))
+
+# === Background prefetch ===
+# Keep today's analytics warm with a background refresh
+PREFETCH_ENABLED = os.getenv("KEYCRM_PREFETCH", "1") != "0"
+
+# Seconds between background refreshes
+PREFETCH_INTERVAL = int(os.getenv("KEYCRM_PREFETCH_INTERVAL", "300"))
+
+# Random spread of each refresh as a fraction of the interval (desynchronizes replicas)
+PREFETCH_JITTER = 0.1
+
+# Upper bound of the delay after repeated failed refreshes (seconds)
+PREFETCH_MAX_BACKOFF = 1800
+
+# === Push ingestion ===
+# Port of the local receiver of new lead, card and call events pushed by KeyCRM or n8n
+# (POST /events); 0 disables it. Single account only (not with KEYCRM_ACCOUNTS).
+PUSH_PORT = int(os.getenv("KEYCRM_PUSH_PORT", "0"))
+
+# Shared secret expected in the X-Webhook-Secret header of pushed events (required)
+PUSH_SECRET = os.getenv("KEYCRM_PUSH_SECRET", "")
+
+# Seconds pushed events are collected before they are applied together
+PUSH_BATCH_DELAY = 1.0
+
+# With push ingestion, the background refresh becomes a full pull that reconciles the
+# pushed analytics every this many seconds (instead of PREFETCH_INTERVAL)
+PUSH_RECONCILE_INTERVAL = int(os.getenv("KEYCRM_PUSH_RECONCILE_INTERVAL", "1800"))
+
+# Seconds between dashboard re-reads of the pushed analytics
+PUSH_UI_REFRESH = 5
+
+# === Diagnostics ===
+# Port of the Prometheus-style /metrics endpoint (0 disables it)
+METRICS_PORT = int(os.getenv("KEYCRM_METRICS_PORT", "0"))
+
+# === Card classification ===
+# Category of each pipeline ID (in the order categories are displayed)
+CATEGORY_PIPELINES = {
+    "Не Алмази": [0, 3, 6, 9, 12, 15, 16],
+    "Алмази": [1, 4, 7, 10, 13],
+    "Діаманти": [2, 5, 8, 11, 14]
+}
+
+# Status IDs that make a card "Прогріті" regardless of the hot custom field
+HOT_STATUS_IDS = {344, 437, 398}
+
+# Status IDs that make a card "Не кваліфіковані" regardless of the qualified custom field
+NOT_QUALIFIED_STATUS_IDS = {341, 386, 396, 435}
+
+# Custom field names used in analytics
+HOT_FIELD_NAME = "ПРОГРІТИЙ (готовий працювати)"
+QUALIFIED_FIELD_NAME = "Кваліфікований повністю"
+CUSTOM_KEYS = [
+    "Закр. Зустріч КИЇВ",
+    "Закр. Навчання В ЗАПИСІ",
+    "Закр. Зустріч ONLINE"
+]
+
+# Pipelines not listed in CATEGORY_PIPELINES are assigned to the first category with a
+# keyword found in the pipeline title (case-insensitive), e.g. {"Діаманти": ["діамант"]}
+CATEGORY_PIPELINE_KEYWORDS = {}
+
+# Status names (case-insensitive, in any pipeline) that count like HOT_STATUS_IDS and
+# NOT_QUALIFIED_STATUS_IDS, so statuses of new pipelines need no ID configuration
+HOT_STATUS_NAMES = set()
+NOT_QUALIFIED_STATUS_NAMES = set()
+
+# Optional custom field UUIDs by field name (e.g. {"Кваліфікований повністю": "LD_1002"});
+# fields are matched by UUID when configured, which survives renames in KeyCRM
+CUSTOM_FIELD_UUIDS = {}
+
 # === Webhook URLs ===
 # Production webhook URL (use for live mode)
 WEBHOOK_PROD_URL = "https://primary-production-76c7.up.railway.app/webhook/get-keycrm-today"
 
 # Test webhook URL (use for testing)
 WEBHOOK_TEST_URL = "https://primary-production-76c7.up.railway.app/webhook-test/get-keycrm-today"
+
+# Timeout for webhook requests (seconds)
+WEBHOOK_TIMEOUT = 20
+
+# Size of the chunks the webhook response is read and parsed in (bytes)
+WEBHOOK_CHUNK_SIZE = 64 * 1024
@@ -0,0 +1,133 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from config.settings import CACHE_DIR, CARD_CACHE_TTL, CARD_CACHE_MAX_ENTRIES
+
+
+class CardCache:
+    """
+    Persistent SQLite cache of raw KeyCRM card payloads keyed by card ID and include string.
+    Entries expire after a TTL, are replaced only by payloads with a newer or equal
+    'updated_at', and the least recently used entries are evicted above a size limit.
+    """
+    def __init__(
+        self,
+        cache_dir: str = CACHE_DIR,
+        ttl: float = CARD_CACHE_TTL,
+        max_entries: int = CARD_CACHE_MAX_ENTRIES
+    ) -> None:
+        """
+        Initialize card cache.
+        Args:
+            cache_dir (str): Directory for the SQLite database file.
+            ttl (float): Time in seconds after which an entry is considered stale.
+            max_entries (int): Maximum number of cached cards.
+        """
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.path: Path = Path(cache_dir) / "cards.sqlite3"
+        self.ttl: float = ttl
+        self.max_entries: int = max_entries
+        self.lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cards ("
+                " card_id INTEGER NOT NULL,"
+                " include TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " updated_at TEXT NOT NULL DEFAULT '',"
+                " fetched_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (card_id, include))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cards_accessed ON cards (accessed_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, card_ids: Iterable[int], include: Optional[str] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Return fresh cached cards for the given IDs.
+        Args:
+            card_ids (Iterable[int]): Card IDs to look up.
+            include (str, optional): Include string the cards were fetched with.
+        Returns:
+            dict: {card_id: card} for cache hits that are not older than the TTL.
+        """
+        ids: List[int] = list(card_ids)
+        if not ids:
+            return {}
+        now = time.time()
+        hits: Dict[int, Dict[str, Any]] = {}
+        with self.lock, self._connect() as conn:
+            # Query in chunks to stay below SQLite's variable limit
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT card_id, data FROM cards WHERE include = ? AND fetched_at >= ?"
+                    f" AND card_id IN ({placeholders})",
+                    [include or "", now - self.ttl, *chunk]
+                ).fetchall()
+                for card_id, data in rows:
+                    hits[card_id] = json.loads(data)
+                conn.execute(
+                    f"UPDATE cards SET accessed_at = ? WHERE include = ? AND card_id IN ({placeholders})",
+                    [now, include or "", *chunk]
+                )
+        return hits
+
+    def put_many(self, cards: Iterable[Dict[str, Any]], include: Optional[str] = None) -> None:
+        """
+        Store cards, keeping an existing entry if it has a newer 'updated_at'.
+        Args:
+            cards (Iterable[dict]): Raw card payloads.
+            include (str, optional): Include string the cards were fetched with.
+        """
+        now = time.time()
+        rows = [
+            (card['id'], include or "", json.dumps(card, ensure_ascii=False), card.get('updated_at') or "", now, now)
+            for card in cards if card.get('id') is not None
+        ]
+        if not rows:
+            return
+        with self.lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO cards (card_id, include, data, updated_at, fetched_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (card_id, include) DO UPDATE SET"
+                " data = excluded.data, updated_at = excluded.updated_at,"
+                " fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at"
+                " WHERE excluded.updated_at >= cards.updated_at",
+                rows
+            )
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove expired entries and the least recently used ones above the size limit.
+        """
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            conn.execute("DELETE FROM cards WHERE fetched_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM cards WHERE rowid IN ("
+                " SELECT rowid FROM cards ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        """
+        Remove all cached cards.
+        """
+        with self.lock, self._connect() as conn:
+            conn.execute("DELETE FROM cards")
@@ -1,62 +1,343 @@
 
+import random
+import time
 import requests
-from typing import Optional, Dict, Any, List
-from config.settings import API_BASE_URL, KEYCRM_API_KEY, TIMEOUT, API_CARDS_ENDPOINT
+from collections import deque
+from itertools import islice
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Optional, Dict, Any, List, Callable, Deque, Iterable, Iterator, Set, Tuple
+from requests.adapters import HTTPAdapter
+from config.settings import (
+    API_BASE_URL, KEYCRM_API_KEY, TIMEOUT, API_CARDS_ENDPOINT, API_PAGE_LIMIT, MAX_WORKERS,
+    RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST, MAX_RETRIES, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX,
+    RETRY_STATUS_CODES, CARD_CACHE_ENABLED, CACHE_DIR
+)
+from src.api.cache import CardCache
+from src.api.rate_limit import RequestStats, get_rate_limiter, parse_retry_after
+from src.utils.metrics import endpoint_label, metrics
+
+
+class ApiError(Exception):
+    """
+    Raised when KeyCRM data cannot be fetched completely after all retries.
+    """
+
+def day_range_filter(date: str) -> str:
+    """
+    Build a KeyCRM '*_between' filter value covering a whole day.
+    Args:
+        date (str): Date in 'YYYY-MM-DD' format.
+    Returns:
+        str: Filter value, e.g. '2024-01-01 00:00:00, 2024-01-01 23:59:59'.
+    """
+    return f"{date} 00:00:00, {date} 23:59:59"
+
 
 class ApiClient:
     """
     KeyCRM API client for working with cards, calls, and pipelines.
     """
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        cache_dir: str = CACHE_DIR
+    ) -> None:
         """
         Initialize KeyCRM API client.
         Args:
             api_key (str, optional): API key for authentication. If None, uses key from settings.
+            base_url (str, optional): API base URL. If None, uses URL from settings.
+            cache_dir (str): Directory of the card cache (card IDs are only unique per account).
         """
-        self.base_url: str = API_BASE_URL
-        self.api_key: str = KEYCRM_API_KEY
+        self.base_url: str = (base_url or API_BASE_URL).rstrip("/")
+        self.api_key: str = api_key or KEYCRM_API_KEY
         self.headers: Dict[str, str] = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        # Shared session keeps connections alive between requests
+        self.session: requests.Session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Calls and card lists are paginated at the same time, each with up to MAX_WORKERS requests
+        adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=2 * MAX_WORKERS)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Rate limiter is shared by all clients using the same API key
+        self.rate_limiter = get_rate_limiter(self.api_key, RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST)
+        self.stats: RequestStats = RequestStats()
+        # Persistent cache of raw card payloads (None disables caching)
+        self.card_cache: Optional[CardCache] = CardCache(cache_dir) if CARD_CACHE_ENABLED else None
+
+    def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """
+        Send a rate-limited GET request, retrying transient failures.
+        Honors Retry-After and uses jittered exponential backoff otherwise.
+        Args:
+            url (str): Request URL.
+            params (dict, optional): Query parameters.
+        Returns:
+            requests.Response: Successful response.
+        Raises:
+            requests.exceptions.RequestException: If the request still fails after all retries.
+        """
+        attempt: int = 0
+        endpoint = endpoint_label(url, self.base_url)
+        while True:
+            waited = self.rate_limiter.acquire()
+            if waited > 0:
+                self.stats.increment("throttled")
+                metrics.increment("rate_limit_wait_seconds_total", waited, endpoint=endpoint)
+            self.stats.increment("requests")
+            retry_after: Optional[float] = None
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=TIMEOUT)
+                metrics.observe("http_request_seconds", time.perf_counter() - started, endpoint=endpoint)
+                metrics.increment("http_requests_total", endpoint=endpoint, status=str(response.status_code))
+                metrics.increment("http_response_bytes_total", len(response.content), endpoint=endpoint)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    self.stats.increment("throttled")
+                error: requests.exceptions.RequestException = requests.exceptions.HTTPError(
+                    f"{response.status_code} Error for url: {response.url}", response=response
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.increment("http_requests_total", endpoint=endpoint, status=type(e).__name__)
+                error = e
+            except requests.exceptions.RequestException:
+                self.stats.increment("failed")
+                raise
+
+            if attempt >= MAX_RETRIES:
+                self.stats.increment("failed")
+                raise error
+            # Full jitter: random delay up to the exponential backoff bound
+            delay = random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+                self.rate_limiter.pause(delay)
+            self.stats.increment("retried")
+            metrics.increment("http_retries_total", endpoint=endpoint)
+            attempt += 1
+            time.sleep(delay)
+
+    def _iter_pages(
+        self,
+        fetch_page: Callable[[int], Dict[str, Any]],
+        max_workers: int = MAX_WORKERS
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield the data of every page of a list endpoint in page order.
+        The first page gives 'total' and 'per_page'; pages 2..N are then fetched
+        concurrently with at most max_workers requests in flight.
+        Args:
+            fetch_page (Callable[[int], dict]): Fetches one page by number (error dict on failure).
+            max_workers (int): Maximum number of pages fetched concurrently.
+        Yields:
+            list: Items of each page.
+        Raises:
+            ApiError: If a page cannot be fetched after all retries.
+        """
+        response = fetch_page(1)
+        if response.get('error'):
+            raise ApiError(f"Error on page 1: {response.get('message')}")
+        data = response.get('data', [])
+        yield data
+        if not data:
+            return
+
+        total = response.get('total', 0)
+        per_page = response.get('per_page', API_PAGE_LIMIT) or API_PAGE_LIMIT
+        last_page = (total + per_page - 1) // per_page  # Calculate last page
+        next_page: int = response.get('current_page', 1) + 1
 
-    def fetch_cards_by_ids(self, card_ids: List[int], include: Optional[str] = None) -> Dict[str, Any]:
+        pending: Deque[Tuple[int, Future]] = deque()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            try:
+                while pending or next_page <= last_page:
+                    # Keep up to max_workers pages in flight
+                    while next_page <= last_page and len(pending) < max_workers:
+                        pending.append((next_page, executor.submit(fetch_page, next_page)))
+                        next_page += 1
+                    page, future = pending.popleft()
+                    response = future.result()
+                    if response.get('error'):
+                        raise ApiError(f"Error on page {page}: {response.get('message')}")
+                    yield response.get('data', [])
+            finally:
+                # Consumer stopped early or a page failed: drop pages not started yet
+                for _, future in pending:
+                    future.cancel()
+
+    def fetch_card(self, card_id: int, include: Optional[str] = None) -> Dict[str, Any]:
         """
-        Fetch cards by a list of IDs.
+        Fetch a single card by ID.
+        Args:
+            card_id (int): Card ID to fetch.
+            include (str, optional): Include string for related fields.
+        Returns:
+            dict: Card data.
+        Raises:
+            requests.exceptions.RequestException: If the request fails.
+        """
+        query_params: Dict[str, Any] = {}
+        if include:
+            query_params['include'] = include
+        url: str = f"{self.base_url}{API_CARDS_ENDPOINT}/{card_id}"
+        response = self._get(url, params=query_params)
+        card_data = response.json()
+        return card_data['data'] if 'data' in card_data else card_data
+
+    def fetch_cards_by_ids(
+        self,
+        card_ids: List[int],
+        include: Optional[str] = None,
+        max_workers: int = MAX_WORKERS,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Fetch cards by a list of IDs concurrently.
         Args:
             card_ids (List[int]): List of card IDs to fetch.
             include (str, optional): Include string for related fields (e.g. 'contact.client,products').
+            max_workers (int): Maximum number of concurrent requests.
+            use_cache (bool): Serve fresh cards from the card cache and fetch only misses.
         Returns:
-            dict: {"error": bool, "data": list}
+            dict: {"error": bool, "data": list, "failed_ids": list}.
+                Cards are returned in input order; IDs that could not be fetched
+                are listed in "failed_ids" and do not discard the other cards.
         """
-        results: List[Dict[str, Any]] = []
+        if not card_ids:
+            return {"error": False, "data": [], "failed_ids": []}
+
+        cached: Dict[int, Dict[str, Any]] = {}
+        if use_cache and self.card_cache is not None:
+            cached = self.card_cache.get_many(card_ids, include=include)
+            metrics.increment("card_cache_hits_total", len(cached))
+            metrics.increment("card_cache_misses_total", len(card_ids) - len(cached))
+        missing: List[int] = [card_id for card_id in card_ids if card_id not in cached]
+
+        def fetch_one(card_id: int) -> Optional[Dict[str, Any]]:
+            try:
+                return self.fetch_card(card_id, include=include)
+            except (requests.exceptions.RequestException, ValueError):
+                return None
+
+        fetched: List[Optional[Dict[str, Any]]] = []
+        if missing:
+            workers = max(1, min(max_workers, len(missing)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # executor.map preserves input order
+                fetched = list(executor.map(fetch_one, missing))
+        by_id: Dict[int, Optional[Dict[str, Any]]] = dict(zip(missing, fetched))
+        if self.card_cache is not None:
+            self.card_cache.put_many([card for card in fetched if card is not None], include=include)
+        by_id.update(cached)
+
+        results: List[Dict[str, Any]] = [by_id[card_id] for card_id in card_ids if by_id.get(card_id) is not None]
+        failed_ids: List[int] = [card_id for card_id in missing if by_id.get(card_id) is None]
+        response: Dict[str, Any] = {
+            "error": bool(failed_ids) and not results,
+            "data": results,
+            "failed_ids": failed_ids
+        }
+        if failed_ids:
+            response["message"] = f"Error fetching {len(failed_ids)} of {len(card_ids)} cards by IDs"
+        return response
+
+    def fetch_cards(
+        self,
+        limit: int = API_PAGE_LIMIT,
+        page: int = 1,
+        include: str = "",
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch a page of cards from the list endpoint with filtering support.
+        Args:
+            limit (int): Number of cards per page (max 50).
+            page (int): Page number.
+            include (str): Include string for related fields.
+            filters (dict, optional): Filters for API (e.g. 'updated_between', 'created_between').
+        Returns:
+            dict: API response with card data.
+        """
+        url: str = f"{self.base_url}{API_CARDS_ENDPOINT}"
+        params: Dict[str, Any] = {
+            "limit": limit,
+            "page": page
+        }
+        if include:
+            params["include"] = include
+        if filters:
+            for key, value in filters.items():
+                params[f"filter[{key}]"] = value
+
         try:
-            for card_id in card_ids:
-                query_params: Dict[str, Any] = {}
-                if include:
-                    query_params['include'] = include
-                url: str = f"{self.base_url}{API_CARDS_ENDPOINT}/{card_id}"
-                response = requests.get(
-                    url,
-                    headers=self.headers,
-                    params=query_params,
-                    timeout=TIMEOUT
-                )
-                response.raise_for_status()
-                card_data = response.json()
-
-                if 'data' in card_data:
-                    results.append(card_data['data'])
-                else:
-                    results.append(card_data)
-            return {"error": False, "data": results}
+            response = self._get(url, params=params)
+            return response.json()
         except requests.exceptions.RequestException as e:
             return {
                 "error": True,
-                "message": f"Error fetching cards by IDs: {str(e)}",
+                "message": f"Error fetching cards: {str(e)}",
                 "data": []
             }
-    
+
+    def fetch_all_cards(
+        self,
+        filters: Dict[str, Any],
+        include: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch all cards matching the list filters, page by page.
+        Args:
+            filters (dict): List filters, e.g. {'updated_between': '...'}.
+            include (str, optional): Include string for related fields.
+        Returns:
+            list: Matching cards.
+        Raises:
+            ApiError: If a page cannot be fetched after all retries.
+        """
+        all_cards: List[Dict[str, Any]] = []
+        for data in self._iter_pages(
+            lambda page: self.fetch_cards(limit=API_PAGE_LIMIT, page=page, include=include or "", filters=filters)
+        ):
+            all_cards.extend(data)
+
+        if self.card_cache is not None:
+            self.card_cache.put_many(all_cards, include=include)
+        return all_cards
+
+    def fetch_cards_bulk(
+        self,
+        card_ids: List[int],
+        filters: Dict[str, Any],
+        include: Optional[str] = None,
+        max_workers: int = MAX_WORKERS
+    ) -> Dict[str, Any]:
+        """
+        Fetch many cards with one paginated list query, falling back to per-ID
+        requests only for IDs the list did not return.
+        Args:
+            card_ids (List[int]): List of card IDs to fetch.
+            filters (dict): List filters narrowing the query, e.g.
+                {'updated_between': day_range_filter('2024-01-01')}.
+            include (str, optional): Include string for related fields.
+            max_workers (int): Maximum number of concurrent per-ID requests.
+        Returns:
+            dict: {"error": bool, "data": list, "failed_ids": list}, cards in input order.
+        """
+        lookup = CardLookup(self, filters, include=include, max_workers=max_workers)
+        try:
+            return lookup.fetch(card_ids)
+        finally:
+            lookup.close()
+
     def fetch_calls(
         self,
         limit: int = 15,
@@ -86,13 +367,7 @@ class ApiClient:
                 params[f"filter[{key}]"] = value
 
         try:
-            response = requests.get(
-                url,
-                headers=self.headers,
-                params=params,
-                timeout=TIMEOUT
-            )
-            response.raise_for_status()
+            response = self._get(url, params=params)
             return response.json()
         except requests.exceptions.RequestException as e:
             return {
@@ -101,71 +376,144 @@ class ApiClient:
                 "data": []
             }
 
-    def fetch_all_calls(
+    def iter_calls(
         self,
         date: Optional[str],
         filters: Optional[Dict[str, Any]] = None,
-        max_calls: int = 500,
-        include: str = ""
-    ) -> List[Dict[str, Any]]:
+        include: str = "",
+        since: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
         """
-        Fetch all calls with pagination and date filtering.
+        Stream calls page by page with date filtering, without a cap.
+        Only the current pages and the IDs of calls already yielded are kept in memory.
         Args:
             date (str, optional): Date in 'YYYY-MM-DD' format for filtering calls.
             filters (dict, optional): Additional filters for API.
-            max_calls (int): Maximum number of calls to fetch.
             include (str): Include string for related fields (manager, service, lead, client).
-        Returns:
-            list: List of calls for the specified date.
+            since (str, optional): Fetch only calls created at or after this
+                'YYYY-MM-DD HH:MM:SS' timestamp of the given date.
+        Yields:
+            dict: Call data, in page order and deduplicated by call ID.
+        Raises:
+            ApiError: If a page cannot be fetched after all retries.
         """
-        all_calls: List[Dict[str, Any]] = []
-        page: int = 1
-        limit: int = 50  # Maximum for KeyCRM API according to docs
+        seen_ids: Set[Any] = set()
+        limit: int = API_PAGE_LIMIT  # Maximum for KeyCRM API according to docs
 
         # If date is provided, create filters for the range
+        filters = dict(filters or {})
         if date:
-            if filters is None:
-                filters = {}
             # Filter by range: from start to end of day
-            filters['created_between'] = f"{date} 00:00:00, {date} 23:59:59"
-
-        while len(all_calls) < max_calls:
-            response = self.fetch_calls(
-                limit=limit,
-                page=page,
-                include=include,
-                filters=filters
-            )
+            filters['created_between'] = day_range_filter(date)
+            if since:
+                filters['created_between'] = f"{since}, {date} 23:59:59"
 
-            if response.get('error'):
-                print(f"Error on page {page}: {response.get('message')}")
-                break
+        pages = self._iter_pages(
+            lambda page: self.fetch_calls(limit=limit, page=page, include=include, filters=filters)
+        )
+        try:
+            for data in pages:
+                for call in data:
+                    if date and call.get('created_at', '')[:10] != date:
+                        continue
+                    # Pages can shift while they are read: skip calls already seen
+                    call_id = call.get('id')
+                    if call_id is not None:
+                        if call_id in seen_ids:
+                            continue
+                        seen_ids.add(call_id)
+                    yield call
+        finally:
+            pages.close()
 
-            data = response.get('data', [])
-            if not data:
-                break
+    def fetch_all_calls(
+        self,
+        date: Optional[str],
+        filters: Optional[Dict[str, Any]] = None,
+        max_calls: Optional[int] = None,
+        include: str = "",
+        since: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch all calls with pagination and date filtering.
+        Args:
+            date (str, optional): Date in 'YYYY-MM-DD' format for filtering calls.
+            filters (dict, optional): Additional filters for API.
+            max_calls (int, optional): Maximum number of calls to fetch (None for no limit).
+            include (str): Include string for related fields (manager, service, lead, client).
+            since (str, optional): Fetch only calls created at or after this
+                'YYYY-MM-DD HH:MM:SS' timestamp of the given date.
+        Returns:
+            list: List of calls for the specified date.
+        Raises:
+            ApiError: If a page cannot be fetched after all retries.
+        """
+        calls = self.iter_calls(date, filters=filters, include=include, since=since)
+        try:
+            return list(islice(calls, max_calls))
+        finally:
+            calls.close()
 
-            if date:
-                filtered_data = [
-                    call for call in data
-                    if call.get('created_at', '')[:10] == date
-                ]
-                all_calls.extend(filtered_data)
-            else:
-                all_calls.extend(data)
-
-            # Check if there are more pages
-            current_page = response.get('current_page', page)
-            total = response.get('total', 0)
-            per_page = response.get('per_page', limit)
-            last_page = (total + per_page - 1) // per_page  # Calculate last page
-
-            if current_page >= last_page or len(all_calls) >= max_calls:
-                break
+    def fetch_pipelines(self, limit: int = API_PAGE_LIMIT, page: int = 1) -> Dict[str, Any]:
+        """
+        Fetch a page of pipelines.
+        Args:
+            limit (int): Number of pipelines per page (max 50).
+            page (int): Page number.
+        Returns:
+            dict: API response with pipelines.
+        """
+        url: str = f"{self.base_url}/pipelines"
+        try:
+            response = self._get(url, params={"limit": limit, "page": page})
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {
+                "error": True,
+                "message": f"Error fetching pipelines: {str(e)}",
+                "data": []
+            }
 
-            page += 1
+    def fetch_all_pipelines(self) -> List[Dict[str, Any]]:
+        """
+        Fetch all pipelines, page by page.
+        Returns:
+            list: Pipelines.
+        Raises:
+            ApiError: If a page cannot be fetched after all retries.
+        """
+        pipelines: List[Dict[str, Any]] = []
+        for data in self._iter_pages(lambda page: self.fetch_pipelines(limit=API_PAGE_LIMIT, page=page)):
+            pipelines.extend(data)
+        return pipelines
 
-        return all_calls[:max_calls]  # Trim to max_calls just in case
+    def fetch_statuses_by_pipeline(
+        self,
+        pipeline_ids: Iterable[int],
+        max_workers: int = MAX_WORKERS
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Fetch the statuses of several pipelines concurrently.
+        Args:
+            pipeline_ids (Iterable[int]): Pipeline IDs.
+            max_workers (int): Maximum number of concurrent requests.
+        Returns:
+            dict: {pipeline_id: list of statuses}.
+        Raises:
+            ApiError: If the statuses of a pipeline cannot be fetched after all retries.
+        """
+        pipeline_ids = list(pipeline_ids)
+        if not pipeline_ids:
+            return {}
+        workers = max(1, min(max_workers, len(pipeline_ids)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            responses = list(executor.map(self.fetch_pipeline_statuses, pipeline_ids))
+        statuses: Dict[int, List[Dict[str, Any]]] = {}
+        for pipeline_id, response in zip(pipeline_ids, responses):
+            if response.get('error'):
+                raise ApiError(response.get('message'))
+            statuses[pipeline_id] = response.get('data', [])
+        return statuses
 
     def fetch_pipeline_statuses(self, pipeline_id: int) -> Dict[str, Any]:
         """
@@ -177,16 +525,103 @@ class ApiClient:
         """
         url: str = f"{self.base_url}/pipelines/{pipeline_id}/statuses"
         try:
-            response = requests.get(
-                url,
-                headers=self.headers,
-                timeout=TIMEOUT
-            )
-            response.raise_for_status()
+            response = self._get(url)
             return response.json()
         except requests.exceptions.RequestException as e:
             return {
                 "error": True,
                 "message": f"Error fetching statuses for pipeline {pipeline_id}: {str(e)}",
                 "data": []
-            }
\ No newline at end of file
+            }
+
+
+class CardLookup:
+    """
+    Resolves card IDs against one filtered list query that is shared by several batches.
+    The list is paged only as far as needed to find the requested IDs, so batches that
+    arrive while calls are still being paginated never re-read pages already seen.
+    IDs the list does not return are fetched one by one.
+    """
+    def __init__(
+        self,
+        client: "ApiClient",
+        filters: Dict[str, Any],
+        include: Optional[str] = None,
+        max_workers: int = MAX_WORKERS
+    ) -> None:
+        """
+        Initialize card lookup.
+        Args:
+            client (ApiClient): KeyCRM API client.
+            filters (dict): List filters narrowing the query (e.g. 'updated_between').
+            include (str, optional): Include string for related fields.
+            max_workers (int): Maximum number of concurrent per-ID requests.
+        """
+        self.client = client
+        self.include = include
+        self.max_workers = max_workers
+        self.listed: Dict[int, Dict[str, Any]] = {}
+        self.exhausted: bool = False
+        self.lock = Lock()
+        self.pages = client._iter_pages(
+            lambda page: client.fetch_cards(limit=API_PAGE_LIMIT, page=page, include=include or "", filters=filters)
+        )
+
+    def _advance(self, wanted: Set[int]) -> None:
+        # Read further pages until every wanted ID is listed or the list ends
+        while not self.exhausted and not wanted <= self.listed.keys():
+            try:
+                data = next(self.pages)
+            except (StopIteration, ApiError):
+                # Cards the list did not return are fetched by ID
+                self.exhausted = True
+                break
+            # Every listed card is current, so it also refreshes the cache
+            if self.client.card_cache is not None:
+                self.client.card_cache.put_many(data, include=self.include)
+            for card in data:
+                if card.get('id') is not None:
+                    self.listed[card['id']] = card
+
+    def fetch(self, card_ids: Iterable[int]) -> Dict[str, Any]:
+        """
+        Fetch cards, serving them from the list query where possible.
+        Args:
+            card_ids (Iterable[int]): Card IDs to fetch.
+        Returns:
+            dict: {"error": bool, "data": list, "failed_ids": list}, cards in input order.
+        """
+        card_ids = list(card_ids)
+        if not card_ids:
+            return {"error": False, "data": [], "failed_ids": []}
+        with self.lock:
+            self._advance(set(card_ids))
+            found: Dict[int, Dict[str, Any]] = {
+                card_id: self.listed[card_id] for card_id in card_ids if card_id in self.listed
+            }
+
+        missing = [card_id for card_id in card_ids if card_id not in found]
+        metrics.increment("card_lookup_listed_total", len(found))
+        metrics.increment("card_lookup_fallback_total", len(missing))
+        fallback = self.client.fetch_cards_by_ids(missing, include=self.include, max_workers=self.max_workers)
+        for card in fallback.get('data', []):
+            found[card.get('id')] = card
+
+        results = [found[card_id] for card_id in card_ids if card_id in found]
+        failed_ids = fallback.get('failed_ids', [])
+        result: Dict[str, Any] = {
+            "error": bool(failed_ids) and not results,
+            "data": results,
+            "failed_ids": failed_ids
+        }
+        if failed_ids:
+            result["message"] = f"Error fetching {len(failed_ids)} of {len(card_ids)} cards by IDs"
+        return result
+
+    def close(self) -> None:
+        """
+        Stop the list query and release its pending pages.
+        """
+        with self.lock:
+            self.pages.close()
+            self.exhausted = True
@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from config.settings import CACHE_DIR, METADATA_CACHE_TTL, METADATA_ENABLED
+from src.api.client import ApiError
+from src.utils.classification import Classifier, get_classifier, set_classifier
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_metadata(api_client) -> Dict[str, Any]:
+    """
+    Fetch all pipelines and then the statuses of every pipeline concurrently.
+    Args:
+        api_client (ApiClient): KeyCRM API client.
+    Returns:
+        dict: {"pipelines": {id: title}, "statuses": {id: {"name", "pipeline_id"}}}.
+    Raises:
+        ApiError: If pipelines or statuses cannot be fetched after all retries.
+    """
+    pipelines: Dict[int, str] = {
+        pipeline['id']: pipeline.get('title') or pipeline.get('name') or ''
+        for pipeline in api_client.fetch_all_pipelines()
+        if pipeline.get('id') is not None
+    }
+    statuses: Dict[int, Dict[str, Any]] = {}
+    for pipeline_id, pipeline_statuses in api_client.fetch_statuses_by_pipeline(pipelines).items():
+        for status in pipeline_statuses:
+            if status.get('id') is not None:
+                statuses[status['id']] = {
+                    "name": status.get('name') or status.get('title') or '',
+                    "pipeline_id": pipeline_id
+                }
+    return {"pipelines": pipelines, "statuses": statuses}
+
+
+class MetadataCache:
+    """
+    JSON file cache of pipeline and status metadata, refetched after a TTL.
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR, ttl: float = METADATA_CACHE_TTL) -> None:
+        """
+        Initialize metadata cache.
+        Args:
+            cache_dir (str): Directory for the cache file.
+            ttl (float): Age after which the metadata is fetched again (seconds).
+        """
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.path: Path = Path(cache_dir) / "metadata.json"
+        self.ttl: float = ttl
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached metadata with its 'fetched_at' time, or None if there is none.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # JSON object keys are strings
+        return {
+            "pipelines": {int(key): title for key, title in cached.get('pipelines', {}).items()},
+            "statuses": {int(key): status for key, status in cached.get('statuses', {}).items()},
+            "fetched_at": cached.get('fetched_at', 0.0)
+        }
+
+    def write(self, metadata: Dict[str, Any]) -> None:
+        """
+        Store metadata, replacing the file atomically.
+        """
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({**metadata, "fetched_at": time.time()}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def load(self, api_client) -> Optional[Dict[str, Any]]:
+        """
+        Return fresh cached metadata, or fetch and cache it. If fetching fails, stale
+        cached metadata is used when available.
+        Args:
+            api_client (ApiClient): KeyCRM API client.
+        Returns:
+            dict or None: Metadata from fetch_metadata, or None if unavailable.
+        """
+        cached = self.read()
+        if cached is not None and time.time() - cached['fetched_at'] < self.ttl:
+            return cached
+        try:
+            metadata = fetch_metadata(api_client)
+        except (ApiError, ValueError) as e:
+            logger.warning("Pipeline metadata could not be fetched: %s", e)
+            return cached
+        try:
+            self.write(metadata)
+        except OSError as e:
+            logger.warning("Pipeline metadata could not be cached: %s", e)
+        return metadata
+
+
+def build_classifier(api_client, cache_dir: str = CACHE_DIR) -> Classifier:
+    """
+    Preload pipelines and statuses (from the metadata cache or the API) and install the
+    classifier built from them; without metadata the ID lists from settings are used.
+    An unchanged classification keeps the current classifier, so refresh states built
+    with it stay valid.
+    Args:
+        api_client (ApiClient): KeyCRM API client.
+        cache_dir (str): Directory of the metadata cache (one per KeyCRM account).
+    Returns:
+        Classifier: Shared classifier.
+    """
+    classifier = Classifier.from_settings()
+    if METADATA_ENABLED:
+        metadata = MetadataCache(cache_dir).load(api_client)
+        if metadata is not None:
+            classifier = Classifier.from_metadata(metadata)
+    return install_classifier(classifier)
+
+
+def load_cached_classifier(cache_dir: str = CACHE_DIR) -> Classifier:
+    """
+    Install the classifier of the cached metadata, whatever its age, without any request
+    (the ID lists from settings stay in use if nothing is cached). Used until
+    build_classifier has loaded current metadata.
+    Args:
+        cache_dir (str): Directory of the metadata cache.
+    Returns:
+        Classifier: Shared classifier.
+    """
+    metadata = MetadataCache(cache_dir).read() if METADATA_ENABLED else None
+    if metadata is None:
+        return get_classifier()
+    return install_classifier(Classifier.from_metadata(metadata))
+
+
+def install_classifier(classifier: Classifier) -> Classifier:
+    """
+    Install a classifier unless an equal one is installed already (refresh states built
+    with the current one stay valid).
+    Returns:
+        Classifier: Shared classifier.
+    """
+    if classifier != get_classifier():
+        set_classifier(classifier)
+    return get_classifier()
@@ -0,0 +1,173 @@
+import hmac
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from config.settings import PUSH_BATCH_DELAY
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Event types applied by src.core.pipeline.apply_events
+EVENT_TYPES = ("lead", "call", "card")
+
+# Largest accepted request body (bytes)
+MAX_BODY_SIZE = 1024 * 1024
+
+
+def parse_events(payload: Any) -> List[Dict[str, Any]]:
+    """
+    Normalize pushed events. Accepted forms, alone or in a list:
+    - {"type": "lead" | "call" | "card", "data": {...}} (e.g. from n8n);
+    - KeyCRM webhooks {"event": "...", "context": {...}}: events with 'call' in the
+      name are calls, all others are cards.
+    Args:
+        payload (Any): Decoded JSON body.
+    Returns:
+        list: Events as {"type", "data"}.
+    Raises:
+        ValueError: If an event has an unknown type or no data object.
+    """
+    items = payload if isinstance(payload, list) else [payload]
+    events: List[Dict[str, Any]] = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError(f"Event is not an object: {item!r}")
+        if 'type' in item:
+            event_type, data = item['type'], item.get('data')
+        else:
+            event_type = "call" if "call" in str(item.get('event', '')).lower() else "card"
+            data = item.get('context')
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type: {event_type!r}")
+        if not isinstance(data, dict):
+            raise ValueError(f"Event without a data object: {item!r}")
+        events.append({"type": event_type, "data": data})
+    return events
+
+
+class PushReceiver:
+    """
+    Local HTTP receiver of new lead, card and call events pushed by KeyCRM or n8n.
+    Requests are only validated and queued; a background thread applies the queued
+    events in batches, so a burst of events costs one analytics update.
+    """
+    def __init__(
+        self,
+        apply: Callable[[List[Dict[str, Any]]], None],
+        secret: str,
+        batch_delay: float = PUSH_BATCH_DELAY
+    ) -> None:
+        """
+        Initialize receiver (call start() to serve).
+        Args:
+            apply (Callable): Applies a batch of events; raising drops the batch (the
+                next full pull reconciles the analytics).
+            secret (str): Shared secret expected in the X-Webhook-Secret header.
+            batch_delay (float): Seconds events are collected before they are applied.
+        Raises:
+            ValueError: If the secret is empty.
+        """
+        if not secret:
+            raise ValueError("Push receiver needs a secret")
+        self.apply = apply
+        self.secret: str = secret
+        self.batch_delay: float = batch_delay
+        self.pending: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def authorized(self, secret: str) -> bool:
+        """
+        Check a request's secret in constant time. The HTTP server decodes header bytes
+        as latin-1, so the header is compared as its raw bytes against the UTF-8 encoded
+        secret; a header that is not latin-1 text is rejected.
+        """
+        try:
+            return hmac.compare_digest(secret.encode("latin-1"), self.secret.encode("utf-8"))
+        except (TypeError, UnicodeEncodeError):
+            return False
+
+    def submit(self, events: List[Dict[str, Any]]) -> None:
+        """
+        Queue events for the next batch.
+        """
+        with self.lock:
+            self.pending.extend(events)
+        for event in events:
+            metrics.increment("push_events_total", type=event['type'])
+        self.wakeup.set()
+
+    def start(self, port: int, host: str = "0.0.0.0") -> "PushReceiver":
+        """
+        Serve POST /events on a port and start applying queued events, from daemon threads.
+        """
+        receiver = self
+
+        class EventHandler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                if self.path.split("?", 1)[0] != "/events":
+                    self.send_error(404)
+                    return
+                if not receiver.authorized(self.headers.get("X-Webhook-Secret", "")):
+                    metrics.increment("push_requests_total", status="403")
+                    self.send_error(403)
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > MAX_BODY_SIZE:
+                    metrics.increment("push_requests_total", status="413")
+                    self.send_error(413)
+                    return
+                try:
+                    events = parse_events(json.loads(self.rfile.read(length) or b"null"))
+                except ValueError as e:
+                    metrics.increment("push_requests_total", status="400")
+                    self.send_error(400, str(e))
+                    return
+                receiver.submit(events)
+                metrics.increment("push_requests_total", status="202")
+                self.send_response(202)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug("push receiver: " + format, *args)
+
+        self.server = ThreadingHTTPServer((host, port), EventHandler)
+        threading.Thread(target=self.server.serve_forever, name="push-receiver", daemon=True).start()
+        threading.Thread(target=self._run, name="push-applier", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop serving and applying events.
+        """
+        self.stop_event.set()
+        self.wakeup.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def _run(self) -> None:
+        while not self.stop_event.is_set():
+            self.wakeup.wait()
+            # Collect the events of a burst before applying them together
+            if self.stop_event.wait(self.batch_delay):
+                return
+            with self.lock:
+                self.wakeup.clear()
+                batch, self.pending = self.pending, []
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                self.apply(batch)
+            except Exception as e:
+                metrics.increment("push_batches_failed_total")
+                logger.warning("%d pushed events could not be applied: %s", len(batch), e)
+                continue
+            metrics.observe("push_apply_seconds", time.perf_counter() - started)
@@ -0,0 +1,137 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the request rate to the KeyCRM API.
+    """
+    def __init__(self, rate_per_minute: float, burst: int) -> None:
+        """
+        Initialize token bucket.
+        Args:
+            rate_per_minute (float): Sustained number of requests allowed per minute
+                (0 or less means unlimited; pauses still apply).
+            burst (int): Maximum number of requests that may be sent back to back.
+        """
+        self.unlimited: bool = rate_per_minute <= 0
+        self.rate: float = rate_per_minute / 60.0
+        self.capacity: float = float(max(1, burst))
+        self.tokens: float = self.capacity
+        self.updated_at: float = time.monotonic()
+        self.paused_until: float = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def acquire(self) -> float:
+        """
+        Block until a request may be sent.
+        Returns:
+            float: Seconds spent waiting (0 if the request was not throttled).
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and (self.unlimited or self.tokens >= 1):
+                    if not self.unlimited:
+                        self.tokens -= 1
+                    return waited
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back all requests sharing this bucket (e.g. after a 429 with Retry-After).
+        Args:
+            seconds (float): Pause duration in seconds.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = 0.0
+            self.updated_at = now
+
+
+class RequestStats:
+    """
+    Thread-safe counters of throttled, retried and failed requests.
+    """
+    def __init__(self) -> None:
+        self.requests: int = 0
+        self.throttled: int = 0
+        self.retried: int = 0
+        self.failed: int = 0
+        self.lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Increment a counter by name ('requests', 'throttled', 'retried', 'failed').
+        """
+        with self.lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: Current counter values.
+        """
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "retried": self.retried,
+                "failed": self.failed
+            }
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(key: str, rate_per_minute: float, burst: int) -> TokenBucket:
+    """
+    Return the token bucket shared by all clients using the same API key.
+    Args:
+        key (str): Bucket key (API key).
+        rate_per_minute (float): Sustained number of requests allowed per minute.
+        burst (int): Maximum number of requests that may be sent back to back.
+    Returns:
+        TokenBucket: Shared token bucket.
+    """
+    with _buckets_lock:
+        if key not in _buckets:
+            _buckets[key] = TokenBucket(rate_per_minute, burst)
+        return _buckets[key]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date.
+    Args:
+        value (str, optional): Header value.
+    Returns:
+        float or None: Delay in seconds, or None if missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
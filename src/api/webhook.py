@@ -0,0 +1,175 @@
+import codecs
+import json
+import threading
+import time
+import requests
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+from requests.adapters import HTTPAdapter
+from config.settings import WEBHOOK_TIMEOUT, WEBHOOK_CHUNK_SIZE
+from src.utils.cards import normalize_card_id
+from src.utils.metrics import metrics
+
+
+def iter_json_items(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Incrementally parse a JSON array, yielding its items one by one while the body
+    is still being read. A top-level object is yielded as a single item.
+    Args:
+        chunks (Iterable[bytes]): Raw response body in chunks (UTF-8).
+    Yields:
+        Any: Parsed array items.
+    Raises:
+        ValueError: If the body is not a JSON array or object.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def read_more() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buffer = buffer[pos:] + text_decoder.decode(b"", final=True)
+        else:
+            buffer = buffer[pos:] + text_decoder.decode(chunk)
+        pos = 0
+        return True
+
+    while True:
+        # Skip whitespace (and item separators once inside the array)
+        while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+            pos += 1
+        if pos == len(buffer):
+            if not read_more():
+                if started:
+                    raise ValueError("Unterminated JSON array")
+                return
+            continue
+        if not started:
+            if buffer[pos] == "{":
+                # A single object instead of an array of objects
+                while read_more():
+                    pass
+                yield json.loads(buffer[pos:])
+                return
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The item is not complete yet
+            if not read_more():
+                raise
+            continue
+        if not eof and not isinstance(item, (dict, list, str)) and (
+            end == len(buffer) or not (buffer[end] in ",]" or buffer[end].isspace())
+        ):
+            # A number cut at a chunk boundary ("1", "1." or "1e") parses as a shorter
+            # number: wait until a delimiter follows it
+            read_more()
+            continue
+        pos = end
+        yield item
+
+
+class WebhookClient:
+    """
+    Client of the new leads webhook. Keeps only the card IDs of the response and sends
+    conditional requests (ETag / Last-Modified), so an unchanged lead list is not
+    downloaded and parsed again.
+    """
+    def __init__(self, url: str, timeout: float = WEBHOOK_TIMEOUT, chunk_size: int = WEBHOOK_CHUNK_SIZE) -> None:
+        """
+        Initialize webhook client.
+        Args:
+            url (str): Webhook URL.
+            timeout (float): Request timeout (seconds).
+            chunk_size (int): Size of the chunks the response is parsed in (bytes).
+        """
+        self.url: str = url
+        self.timeout: float = timeout
+        self.chunk_size: int = chunk_size
+        # Shared session keeps the connection alive between refreshes
+        self.session: requests.Session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.card_ids: Set[int] = set()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _count_bytes(chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            metrics.increment("http_response_bytes_total", len(chunk), endpoint="webhook")
+            yield chunk
+
+    def fetch_card_ids(self) -> Dict[str, Any]:
+        """
+        Fetch the card IDs of today's new leads.
+        Returns:
+            dict: {"card_ids": set of card IDs, "not_modified": True if the server
+                answered 304 and the previous IDs were reused, "empty": True if the
+                response had no leads at all}.
+        Raises:
+            requests.exceptions.RequestException: If the request fails.
+            ValueError: If the response is not valid JSON.
+        """
+        with self.lock:
+            headers: Dict[str, str] = {}
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+            started = time.perf_counter()
+            with self.session.get(self.url, headers=headers, timeout=self.timeout, stream=True) as resp:
+                metrics.increment("http_requests_total", endpoint="webhook", status=str(resp.status_code))
+                if resp.status_code == 304:
+                    metrics.observe("http_request_seconds", time.perf_counter() - started, endpoint="webhook")
+                    return {"card_ids": set(self.card_ids), "not_modified": True, "empty": False}
+                resp.raise_for_status()
+                card_ids: Set[int] = set()
+                empty = True
+                for item in iter_json_items(self._count_bytes(resp.iter_content(chunk_size=self.chunk_size))):
+                    empty = False
+                    if isinstance(item, dict):
+                        card_id = normalize_card_id(item.get('card_id'))
+                        if card_id is not None:
+                            card_ids.add(card_id)
+                self.card_ids = card_ids
+                self.etag = resp.headers.get("ETag")
+                self.last_modified = resp.headers.get("Last-Modified")
+            metrics.observe("http_request_seconds", time.perf_counter() - started, endpoint="webhook")
+            return {"card_ids": set(card_ids), "not_modified": False, "empty": empty}
+
+
+_clients: Dict[str, WebhookClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_webhook_client(url: str) -> WebhookClient:
+    """
+    Return the webhook client shared by all refreshes of the same URL, so that
+    conditional request validators and connections are reused.
+    Args:
+        url (str): Webhook URL.
+    Returns:
+        WebhookClient: Shared webhook client.
+    """
+    with _clients_lock:
+        if url not in _clients:
+            _clients[url] = WebhookClient(url)
+        return _clients[url]
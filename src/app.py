@@ -1,19 +1,24 @@
 import sys
 import streamlit as st
 from pathlib import Path
-from datetime import datetime
-
-# Get today's date
-TODAY = datetime.now().strftime("%Y-%m-%d")
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
 
 # Add parent directory to sys.path for imports
 root_path = Path(__file__).parent.parent
 sys.path.insert(0, str(root_path))
 
-from src.api.client import ApiClient
-from config.settings import WEBHOOK_TEST_URL
-from src.utils.data_processing import process_all_data
-from src.components.tables import render_manager_tables, create_simple_dataframe
+from config.settings import WEBHOOK_TEST_URL, PREFETCH_ENABLED, PUSH_UI_REFRESH
+from src.core.dates import current_kyiv_date, kyiv_tz
+from src.utils.data_processing import (
+    process_all_data, process_range_data, get_analytics_cache, get_prefetch_scheduler,
+    get_metrics_server, get_push_receiver, get_api_client, get_metadata_scheduler, analytics_cache_key,
+    PUSH_ENABLED
+)
+from src.utils.metrics import metrics
+
+# Components (pandas, numpy) are imported when there is something to render, so the
+# first page view of a fresh server does not wait for them
 
 
 def main() -> None:
@@ -28,30 +33,119 @@ def main() -> None:
     )
     st.title("📊 KeyCRM Analytics Dashboard")
 
+    # Prometheus-style /metrics endpoint (if KEYCRM_METRICS_PORT is set)
+    get_metrics_server()
+
+    # Classify cards by the pipelines and statuses currently configured in KeyCRM (loaded
+    # in the background; cached metadata or settings are used until then)
+    get_metadata_scheduler()
+
+    # Keep today's analytics warm in the background (with push ingestion: reconcile them)
+    if PREFETCH_ENABLED:
+        get_prefetch_scheduler()
+
+    # Apply lead, card and call events pushed by KeyCRM or n8n (if KEYCRM_PUSH_PORT is set)
+    get_push_receiver()
+
     # Sidebar settings
     st.sidebar.header("⚙️ Settings")
 
-    # Button to process all data (new leads + calls)
+    # Incremental refresh fetches only what changed since the previous refresh
+    incremental = st.sidebar.checkbox(
+        "Incremental refresh",
+        value=True,
+        help="Fetch only new calls and new or changed cards since the last refresh"
+    )
+
+    # Button to process all data (new leads + calls); a fresh shared result is reused
     if st.sidebar.button("🔄 Process all data", type="primary"):
-        api_client = ApiClient()
-        process_all_data(api_client)
+        process_all_data(get_api_client(), incremental=incremental)
+
+    # Button to refresh even if the shared result is still fresh
+    if st.sidebar.button("⚡ Force refresh"):
+        process_all_data(get_api_client(), incremental=incremental, force=True)
+
+    # Date range report built from stored per-day aggregates
+    st.sidebar.subheader("📅 Date range")
+    today = datetime.strptime(current_kyiv_date(), "%Y-%m-%d").date()
+    date_range = st.sidebar.date_input(
+        "Period",
+        value=(today - timedelta(days=6), today),
+        max_value=today
+    )
+    if st.sidebar.button("📊 Build range report") and len(date_range) == 2:
+        process_range_data(get_api_client(), date_range[0].strftime("%Y-%m-%d"), date_range[1].strftime("%Y-%m-%d"))
 
     # Display results section
-    display_results()
+    display_range_results()
+    display_live_results()
+
+    # Request and timing statistics of this process (built only when shown)
+    if st.toggle("🩺 Diagnostics"):
+        from src.components.diagnostics import render_diagnostics
+        render_diagnostics(metrics)
+
+
+def display_range_results() -> None:
+    """
+    Display analytics for the selected date range.
+    """
+    if 'range_data' in st.session_state:
+        range_data = st.session_state['range_data']
+        st.markdown("---")
+        st.header(f"📅 {range_data['start']} — {range_data['end']}")
+        from src.components.tables import render_manager_tables
+        account = select_account(range_data, key="range_account")
+        render_manager_tables(range_data['accounts'][account] if account else range_data['analytics'])
+
+
+def select_account(data: Dict[str, Any], key: str) -> Optional[str]:
+    """
+    Let the user pick one KeyCRM account of a multi-account result.
+    Args:
+        data (dict): Result with an optional per-account breakdown under 'accounts'.
+        key (str): Widget key.
+    Returns:
+        str or None: Selected account name, or None for all accounts combined.
+    """
+    if not data.get('accounts'):
+        return None
+    all_label = "All accounts"
+    account = st.radio("Account", [all_label] + list(data['accounts']), horizontal=True, key=key)
+    return None if account == all_label else account
 
 
 def display_results() -> None:
     """
     Display analytics results and cards table.
     """
+    # Show the latest shared snapshot of today (refreshed in the background or by any session)
+    entry = get_analytics_cache().get(analytics_cache_key(current_kyiv_date()))
+    if entry is not None:
+        st.session_state['all_data'] = entry.value['all_data']
+
     if 'all_data' in st.session_state:
         st.markdown("---")
+        if entry is not None:
+            updated_at = datetime.fromtimestamp(entry.computed_at, kyiv_tz).strftime("%H:%M:%S")
+            st.caption(f"🕒 Last updated: {updated_at} (version {entry.version})")
         # st.header("📊 Manager Analytics")
+        from src.components.tables import render_manager_tables, render_cards_table
         data = st.session_state['all_data']
+        account = select_account(data, key="account")
+        if account:
+            data = data['accounts'][account]
         render_manager_tables(data['analytics'])
         with st.expander("📋 All cards"):
-            df_cards = create_simple_dataframe(data['cards'])
-            st.dataframe(df_cards, use_container_width=True)
+            render_cards_table(data['card_table'])
+
+
+# With push ingestion the results are re-read every few seconds, so pushed events show
+# up without user interaction (partial reruns need a Streamlit version with st.fragment)
+if PUSH_ENABLED and hasattr(st, "fragment"):
+    display_live_results = st.fragment(run_every=PUSH_UI_REFRESH)(display_results)
+else:
+    display_live_results = display_results
 
 
 if __name__ == "__main__":
@@ -0,0 +1,185 @@
+"""
+Headless batch export of KeyCRM analytics, without Streamlit.
+
+Usage (from the repository root):
+    python -m src.cli                                             # today, CSV files in ./reports
+    python -m src.cli --date 2024-05-10 --format parquet
+    python -m src.cli --start 2024-05-01 --end 2024-05-07 --format json --output /data/reports
+
+A single day writes analytics_<date> and cards_<date>; a date range writes the combined
+analytics_<start>_<end> (finished days come from the per-day aggregate store).
+With KEYCRM_ACCOUNTS set, every account is fetched in its own worker process and the files
+get an 'Акаунт' column: analytics of all accounts combined ('Всі') and of each account,
+and the cards of each account.
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Add parent directory to sys.path for imports when run as a script
+root_path = Path(__file__).parent.parent
+if str(root_path) not in sys.path:
+    sys.path.insert(0, str(root_path))
+
+from config.settings import ACCOUNTS, WEBHOOK_PROD_URL
+from src.api.client import ApiClient
+from src.api.metadata import build_classifier
+from src.core.accounts import build_accounts_range, compute_accounts_day
+from src.core.pipeline import build_range_analytics, compute_day_data, current_kyiv_date
+from src.utils.aggregate_store import AggregateStore
+from src.utils.analytics import build_manager_table_frame
+from src.utils.metrics import metrics
+
+logger = logging.getLogger("keycrm.cli")
+
+FORMATS = ("csv", "parquet", "json")
+
+
+def analytics_export_frame(manager_dict) -> pd.DataFrame:
+    """
+    Flatten the manager analytics table for export: one row per manager and category
+    (including 'Всього' rows) and one column per counter.
+    """
+    frame = build_manager_table_frame(manager_dict)
+    frame.columns = [" / ".join(part for part in column if part) for column in frame.columns]
+    return frame.reset_index()
+
+
+def by_account(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Join frames of several accounts, with the account name in a leading 'Акаунт' column.
+    """
+    frame = pd.concat(
+        [frame.assign(**{"Акаунт": name}) for name, frame in frames.items()],
+        ignore_index=True
+    )
+    return frame[["Акаунт"] + [column for column in frame.columns if column != "Акаунт"]]
+
+
+def cards_export_frame(card_table) -> pd.DataFrame:
+    """
+    Cards table with the category of each card.
+    """
+    return card_table.to_frame().assign(**{"Категорія": card_table.categories})
+
+
+def write_frame(frame: pd.DataFrame, path: Path, file_format: str) -> Path:
+    """
+    Write a frame as CSV, Parquet or JSON (records).
+    Args:
+        frame (pd.DataFrame): Table to write.
+        path (Path): Output path without extension.
+        file_format (str): 'csv', 'parquet' or 'json'.
+    Returns:
+        Path: Written file.
+    Raises:
+        RuntimeError: If Parquet is requested but no Parquet engine is installed.
+    """
+    path = path.with_suffix(f".{file_format}")
+    if file_format == "csv":
+        # UTF-8 with BOM, so spreadsheet apps detect the Cyrillic headers
+        frame.to_csv(path, index=False, encoding="utf-8-sig")
+    elif file_format == "parquet":
+        try:
+            frame.to_parquet(path, index=False)
+        except ImportError as e:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)") from e
+    else:
+        frame.to_json(path, orient="records", force_ascii=False, indent=2)
+    return path
+
+
+def valid_date(value: str) -> str:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {value}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export KeyCRM analytics and cards without the Streamlit app")
+    parser.add_argument("--date", type=valid_date, help="Day to export (default: today, Kyiv time)")
+    parser.add_argument("--start", type=valid_date, help="First day of a date range (with --end)")
+    parser.add_argument("--end", type=valid_date, help="Last day of a date range, inclusive (with --start)")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="Output format (default: csv)")
+    parser.add_argument("--output", type=Path, default=Path("reports"), help="Output directory (default: ./reports)")
+    parser.add_argument("--webhook-url", default=WEBHOOK_PROD_URL, help="Webhook URL with today's new leads")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log progress and request metrics")
+    options = parser.parse_args(argv)
+
+    if (options.start is None) != (options.end is None):
+        parser.error("--start and --end go together")
+    if options.date and options.start:
+        parser.error("use either --date or --start/--end")
+    if options.start and options.start > options.end:
+        parser.error("--start is after --end")
+
+    logging.basicConfig(
+        level=logging.INFO if options.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    options.output.mkdir(parents=True, exist_ok=True)
+    try:
+        if not ACCOUNTS:
+            api_client = ApiClient()
+            build_classifier(api_client)
+        if options.start:
+            if ACCOUNTS:
+                # Each account is fetched in its own worker process
+                range_data = build_accounts_range(ACCOUNTS, options.start, options.end)
+            else:
+                range_data = build_range_analytics(
+                    api_client, options.start, options.end, AggregateStore(), options.webhook_url
+                )
+            for message in range_data['warnings']:
+                logger.warning(message)
+            logger.info(
+                "%d days, %d fetched from the API", range_data['days'], len(range_data['fetched_days'])
+            )
+            analytics = analytics_export_frame(range_data['analytics'])
+            if ACCOUNTS:
+                analytics = by_account({"Всі": analytics, **{
+                    name: analytics_export_frame(manager_dict) for name, manager_dict in range_data['accounts'].items()
+                }})
+            written = [write_frame(analytics, options.output / f"analytics_{options.start}_{options.end}", options.format)]
+        else:
+            date = options.date or current_kyiv_date()
+            if ACCOUNTS:
+                result = compute_accounts_day(ACCOUNTS, date)
+            else:
+                result = compute_day_data(api_client, date, options.webhook_url)
+            for message in result['warnings']:
+                logger.warning(message)
+            all_data = result['all_data']
+            analytics = analytics_export_frame(all_data['analytics'])
+            cards = cards_export_frame(all_data['card_table'])
+            if ACCOUNTS:
+                per_account = all_data['accounts']
+                analytics = by_account({"Всі": analytics, **{
+                    name: analytics_export_frame(data['analytics']) for name, data in per_account.items()
+                }})
+                # The combined cards are the accounts' cards joined, so only those are written
+                cards = by_account({name: cards_export_frame(data['card_table']) for name, data in per_account.items()})
+            written = [
+                write_frame(analytics, options.output / f"analytics_{date}", options.format),
+                write_frame(cards, options.output / f"cards_{date}", options.format)
+            ]
+    except Exception as e:
+        logger.error("Export failed: %s", e)
+        return 1
+    finally:
+        if options.verbose:
+            metrics.log_snapshot("export")
+
+    for path in written:
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import streamlit as st
+import pandas as pd
+from typing import Any, Dict, List, Optional
+from src.utils.metrics import Metrics
+
+
+def hit_rate(hits: float, misses: float) -> Optional[float]:
+    """
+    Returns hits / (hits + misses) in percent, or None if there were no lookups.
+    """
+    total = hits + misses
+    return round(100 * hits / total, 1) if total else None
+
+
+def build_endpoint_frame(snapshot: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Summarize HTTP metrics per endpoint.
+    Args:
+        snapshot (dict): Metrics snapshot from Metrics.snapshot().
+    Returns:
+        pd.DataFrame: Requests, errors, retries, bytes and latency per endpoint.
+    """
+    rows: Dict[str, Dict[str, Any]] = {}
+
+    def row(endpoint: str) -> Dict[str, Any]:
+        return rows.setdefault(endpoint, {
+            "Endpoint": endpoint, "Requests": 0, "Errors": 0, "Retries": 0, "KB": 0.0,
+            "Avg, s": None, "p50 ≤, s": None, "p95 ≤, s": None
+        })
+
+    for counter in snapshot['counters']:
+        endpoint = counter['labels'].get('endpoint')
+        if endpoint is None:
+            continue
+        if counter['name'] == "http_requests_total":
+            row(endpoint)["Requests"] += int(counter['value'])
+            status = counter['labels'].get('status', '')
+            if not (status.isdigit() and int(status) < 400):
+                row(endpoint)["Errors"] += int(counter['value'])
+        elif counter['name'] == "http_retries_total":
+            row(endpoint)["Retries"] += int(counter['value'])
+        elif counter['name'] == "http_response_bytes_total":
+            row(endpoint)["KB"] = round(row(endpoint)["KB"] + counter['value'] / 1024, 1)
+    for histogram in snapshot['histograms']:
+        if histogram['name'] != "http_request_seconds" or not histogram['count']:
+            continue
+        endpoint_row = row(histogram['labels']['endpoint'])
+        endpoint_row["Avg, s"] = round(histogram['sum'] / histogram['count'], 3)
+        endpoint_row["p50 ≤, s"] = histogram['p50']
+        endpoint_row["p95 ≤, s"] = histogram['p95']
+    return pd.DataFrame(list(rows.values()))
+
+
+def render_diagnostics(metrics: Metrics) -> None:
+    """
+    Render stage timings, per-endpoint request statistics and cache hit rates.
+    Args:
+        metrics (Metrics): Metrics registry.
+    """
+    snapshot = metrics.snapshot()
+    if not snapshot['counters'] and not snapshot['stages']:
+        st.caption("No requests yet")
+        return
+
+    if snapshot['stages']:
+        st.markdown("**Last refresh by stage**")
+        st.caption("Calls and card fetches overlap: 'cards' is the wait for card batches after the last call page")
+        stages = pd.DataFrame(
+            [(stage, round(seconds, 3)) for stage, seconds in snapshot['stages'].items()],
+            columns=["Stage", "Seconds"]
+        )
+        st.dataframe(stages, hide_index=True, use_container_width=True)
+
+    endpoints = build_endpoint_frame(snapshot)
+    if not endpoints.empty:
+        st.markdown("**Requests by endpoint**")
+        st.dataframe(endpoints, hide_index=True, use_container_width=True)
+
+    rates: List[Dict[str, Any]] = [
+        {
+            "Cache": "Card cache",
+            "Hit rate, %": hit_rate(metrics.counter_total("card_cache_hits_total"), metrics.counter_total("card_cache_misses_total"))
+        },
+        {
+            "Cache": "Cards found by list query",
+            "Hit rate, %": hit_rate(metrics.counter_total("card_lookup_listed_total"), metrics.counter_total("card_lookup_fallback_total"))
+        },
+        {
+            "Cache": "Shared analytics",
+            "Hit rate, %": hit_rate(
+                metrics.counter_total("analytics_cache_requests_total", result="hit"),
+                metrics.counter_total("analytics_cache_requests_total", result="miss")
+            )
+        },
+        {
+            "Cache": "Webhook not modified (304)",
+            "Hit rate, %": hit_rate(
+                metrics.counter_total("http_requests_total", endpoint="webhook", status="304"),
+                metrics.counter_total("http_requests_total", endpoint="webhook")
+                - metrics.counter_total("http_requests_total", endpoint="webhook", status="304")
+            )
+        }
+    ]
+    st.markdown("**Cache hit rates**")
+    st.dataframe(pd.DataFrame(rates), hide_index=True, use_container_width=True)
+
+    st.download_button(
+        "⬇️ Prometheus metrics",
+        data=metrics.to_prometheus(),
+        file_name="keycrm_metrics.txt",
+        mime="text/plain"
+    )
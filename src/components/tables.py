@@ -1,99 +1,50 @@
+import json
 import streamlit as st
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple, Union
+from src.utils.analytics import TOTAL_LABEL, build_manager_table_frame
+from src.utils.card_table import CardTable, DISPLAY_COLUMNS, card_display_row
+from src.utils.cards import Card
+from src.utils.classification import get_classifier
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def render_manager_tables_html(manager_dict_json: str, categories: Tuple[str, ...]) -> str:
+    """
+    Render the manager analytics table to HTML. Cached by the serialized analytics
+    and the displayed categories, so Streamlit reruns with unchanged analytics skip
+    rebuilding it.
+    Args:
+        manager_dict_json (str): Nested analytics by manager and category as JSON.
+        categories (tuple): Displayed categories (part of the cache key only).
+    Returns:
+        str: HTML table with merged headers.
+    """
+    frame = build_manager_table_frame(json.loads(manager_dict_json))
+    frame = frame.rename(index=lambda manager: f"👤 {manager}", level=0)
+    # Bold 'Всього' rows
+    styles = pd.DataFrame("", index=frame.index, columns=frame.columns)
+    styles.loc[frame.index.get_level_values(1) == TOTAL_LABEL] = "font-weight:bold;"
+    styler = (
+        frame.style
+        .apply(lambda _: styles, axis=None)
+        .set_table_attributes("border='1' style='border-collapse:collapse;width:100%;'")
+    )
+    return styler.to_html()
+
 
 def render_manager_tables(manager_dict: Dict[str, Any]) -> None:
     """
     Render manager analytics tables with visual cell merging.
-    Table headers and labels are in Ukrainian.
+    All managers are rendered as one table with a single component call.
     Args:
         manager_dict (dict): Nested analytics by manager and category.
     """
-    default_categories: List[str] = ["Не Алмази", "Алмази", "Діаманти"]
-    custom_keys: List[str] = ["Закр. Зустріч КИЇВ", "Закр. Навчання В ЗАПИСІ", "Закр. Зустріч ONLINE"]
-    for manager, categories in manager_dict.items():
-        st.markdown(f"### 👤 {manager}")
-        html = "<table border='1' style='border-collapse:collapse;width:100%;'>"
-        html += (
-            "<tr>"
-            "<th rowspan='2'>Категорія</th>"
-            "<th colspan='2'>Нові</th>"
-            "<th colspan='2'>Попередні</th>"
-            "<th rowspan='2'>Не кваліфіковані</th>"
-            f"<th rowspan='2'>{custom_keys[0]}</th>"
-            f"<th rowspan='2'>{custom_keys[1]}</th>"
-            f"<th rowspan='2'>{custom_keys[2]}</th>"
-            "</tr>"
-            "<tr>"
-            "<th>Прогріті</th><th>Не прогріті</th>"
-            "<th>Прогріті</th><th>Не прогріті</th>"
-            "</tr>"
-        )
-        # Calculate totals for 'Всього' category
-        total_stats = {
-            "Нові": {"Прогріті": 0, "Не прогріті": 0},
-            "Попередні": {"Прогріті": 0, "Не прогріті": 0},
-            "Не кваліфіковані": 0,
-            custom_keys[0]: 0,
-            custom_keys[1]: 0,
-            custom_keys[2]: 0
-        }
-        for category in default_categories:
-            stats = categories.get(category, None)
-            if stats is None:
-                stats = {
-                    "Нові": {"Прогріті": 0, "Не прогріті": 0},
-                    "Попередні": {"Прогріті": 0, "Не прогріті": 0},
-                    "Не кваліфіковані": 0,
-                    custom_keys[0]: 0,
-                    custom_keys[1]: 0,
-                    custom_keys[2]: 0
-                }
-            # Sum each column for totals
-            total_stats["Нові"]["Прогріті"] += stats["Нові"]["Прогріті"]
-            total_stats["Нові"]["Не прогріті"] += stats["Нові"]["Не прогріті"]
-            total_stats["Попередні"]["Прогріті"] += stats["Попередні"]["Прогріті"]
-            total_stats["Попередні"]["Не прогріті"] += stats["Попередні"]["Не прогріті"]
-            total_stats["Не кваліфіковані"] += stats.get("Не кваліфіковані", 0)
-            total_stats[custom_keys[0]] += stats.get(custom_keys[0], 0)
-            total_stats[custom_keys[1]] += stats.get(custom_keys[1], 0)
-            total_stats[custom_keys[2]] += stats.get(custom_keys[2], 0)
-        for category in default_categories:
-            stats = categories.get(category, None)
-            if stats is None:
-                stats = {
-                    "Нові": {"Прогріті": 0, "Не прогріті": 0},
-                    "Попередні": {"Прогріті": 0, "Не прогріті": 0},
-                    "Не кваліфіковані": 0,
-                    custom_keys[0]: 0,
-                    custom_keys[1]: 0,
-                    custom_keys[2]: 0
-                }
-            html += "<tr>"
-            html += f"<td>{category}</td>"
-            html += f"<td>{stats['Нові']['Прогріті']}</td>"
-            html += f"<td>{stats['Нові']['Не прогріті']}</td>"
-            html += f"<td>{stats['Попередні']['Прогріті']}</td>"
-            html += f"<td>{stats['Попередні']['Не прогріті']}</td>"
-            html += f"<td>{stats.get('Не кваліфіковані', 0)}</td>"
-            html += f"<td>{stats.get(custom_keys[0], 0)}</td>"
-            html += f"<td>{stats.get(custom_keys[1], 0)}</td>"
-            html += f"<td>{stats.get(custom_keys[2], 0)}</td>"
-            html += "</tr>"
-        # Add totals row for 'Всього'
-        html += "<tr style='font-weight:bold;'>"
-        html += f"<td>Всього</td>"
-        html += f"<td>{total_stats['Нові']['Прогріті']}</td>"
-        html += f"<td>{total_stats['Нові']['Не прогріті']}</td>"
-        html += f"<td>{total_stats['Попередні']['Прогріті']}</td>"
-        html += f"<td>{total_stats['Попередні']['Не прогріті']}</td>"
-        html += f"<td>{total_stats['Не кваліфіковані']}</td>"
-        html += f"<td>{total_stats[custom_keys[0]]}</td>"
-        html += f"<td>{total_stats[custom_keys[1]]}</td>"
-        html += f"<td>{total_stats[custom_keys[2]]}</td>"
-        html += "</tr>"
-        html += "</table>"
-        st.markdown(html, unsafe_allow_html=True)
+    if not manager_dict:
+        return
+    html = render_manager_tables_html(
+        json.dumps(manager_dict, ensure_ascii=False), tuple(get_classifier().categories)
+    )
+    st.markdown(html, unsafe_allow_html=True)
 
 def convert_manager_dict_to_df(manager_dict: Dict[str, Any]) -> pd.DataFrame:
     """
@@ -117,27 +68,41 @@ def convert_manager_dict_to_df(manager_dict: Dict[str, Any]) -> pd.DataFrame:
                     })
     return pd.DataFrame(rows) if rows else pd.DataFrame()
 
-def create_simple_dataframe(cards: List[Dict[str, Any]]) -> pd.DataFrame:
+def create_simple_dataframe(cards: List[Union[Card, Dict[str, Any]]]) -> pd.DataFrame:
     """
     Create a simple DataFrame for cards.
     Args:
-        cards (list): List of card dicts.
+        cards (list): List of compact cards (raw card dicts are parsed first).
     Returns:
         pd.DataFrame: Table of cards.
     """
     if not cards:
         return pd.DataFrame()
-    rows: List[Dict[str, Any]] = []
-    for card in cards:
-        row = {
-            'ID': card.get('id'),
-            'Назва': card.get('title'),
-            'Контакт': card.get('contact', {}).get('full_name', 'N/A') if card.get('contact') else 'N/A',
-            'Телефон': card.get('contact', {}).get('phone', 'N/A') if card.get('contact') else 'N/A',
-            'Статус': card.get('status', {}).get('name', 'N/A') if card.get('status') else 'N/A',
-            'Менеджер': card.get('manager', {}).get('full_name', 'N/A') if card.get('manager') else 'N/A',
-            'Створено': card.get('created_at'),
-        }
-        rows.append(row)
-    return pd.DataFrame(rows)
+    return pd.DataFrame([card_display_row(card) for card in cards], columns=DISPLAY_COLUMNS)
+
+def render_cards_table(card_table: CardTable, page_size_options: Tuple[int, ...] = (50, 100, 500)) -> None:
+    """
+    Render the cards table filtered by manager and category, one page at a time.
+    Only the visible page is turned into a DataFrame.
+    Args:
+        card_table (CardTable): Compact table of cards.
+        page_size_options (tuple): Selectable page sizes.
+    """
+    all_label = "Всі"
+    filter_columns = st.columns(3)
+    manager = filter_columns[0].selectbox("Менеджер", [all_label] + card_table.managers(), key="cards_manager")
+    category = filter_columns[1].selectbox("Категорія", [all_label] + get_classifier().categories, key="cards_category")
+    page_size = filter_columns[2].selectbox("Рядків на сторінці", page_size_options, key="cards_page_size")
 
+    rows = card_table.filter(
+        manager=None if manager == all_label else manager,
+        category=None if category == all_label else category
+    )
+    pages = max(1, -(-len(rows) // page_size))
+    # Filters may shrink the number of pages below the selected one
+    if st.session_state.get("cards_page", 1) > pages:
+        st.session_state["cards_page"] = 1
+    page = int(st.number_input("Сторінка", min_value=1, max_value=pages, step=1, key="cards_page"))
+    start = (page - 1) * page_size
+    st.caption(f"{min(start + 1, len(rows))}–{min(start + page_size, len(rows))} of {len(rows)}")
+    st.dataframe(card_table.page(rows, page, page_size), use_container_width=True)
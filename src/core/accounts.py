@@ -0,0 +1,272 @@
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config.settings import CACHE_DIR, METADATA_CACHE_TTL
+from src.api.client import ApiClient
+from src.api.metadata import build_classifier
+from src.core.pipeline import build_range_analytics, compute_all_data, compute_day_data
+from src.utils.aggregate_store import AggregateStore
+from src.utils.analytics import merge_manager_dicts
+from src.utils.card_table import CardTable
+from src.utils.classification import Classifier, get_classifier, set_classifier
+from src.utils.metrics import metrics
+
+# Refresh of several KeyCRM accounts: each account runs the pipeline of
+# src/core/pipeline.py in its own worker process, with its own API client, rate limit,
+# caches and classifier, so the accounts are fetched in parallel and the refresh takes
+# as long as the slowest account. The per-account results are merged into one view.
+
+def account_cache_dir(name: str) -> str:
+    """
+    Returns the cache directory of an account (card IDs and pipelines are per account).
+    """
+    return str(Path(CACHE_DIR) / "accounts" / (re.sub(r"\W+", "_", name).strip("_") or "account"))
+
+# Per (worker) process: {account name: (account settings, client, classifier, built at)}
+_account_clients: Dict[str, Tuple[Dict[str, Any], ApiClient, Classifier, float]] = {}
+_account_clients_lock = threading.Lock()
+
+def account_client(name: str, account: Dict[str, Any]) -> ApiClient:
+    """
+    Return the API client of an account and install the account's classifier in this
+    (worker) process. The client and classifier are kept for later tasks of the same
+    account, so its session, rate limit and metadata are reused; the classifier is
+    rebuilt after METADATA_CACHE_TTL.
+    Args:
+        name (str): Account name.
+        account (dict): Account settings ('api_key', optional 'base_url').
+    Returns:
+        ApiClient: Client with the account's rate limit and card cache.
+    """
+    with _account_clients_lock:
+        settings, api_client, classifier, built_at = _account_clients.get(name, (None, None, None, 0.0))
+        if settings != account:
+            cache_dir = account_cache_dir(name)
+            api_client = ApiClient(api_key=account['api_key'], base_url=account.get('base_url'), cache_dir=cache_dir)
+            built_at = 0.0
+        if time.time() - built_at >= METADATA_CACHE_TTL:
+            classifier = build_classifier(api_client, account_cache_dir(name))
+            _account_clients[name] = (dict(account), api_client, classifier, time.time())
+        elif get_classifier() != classifier:
+            # The worker may have run a task of another account since
+            set_classifier(classifier)
+        return api_client
+
+def compute_account_data(name: str, account: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Worker: refresh today's analytics of one account (see compute_all_data).
+    Returns:
+        dict: {"state", "all_data", "warnings", "seconds"}.
+    """
+    started = time.perf_counter()
+    result = compute_all_data(account_client(name, account), account.get('webhook_url'), previous)
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+def compute_account_day(name: str, account: Dict[str, Any], date: str) -> Dict[str, Any]:
+    """
+    Worker: build the analytics and cards of one account for any day (see compute_day_data).
+    Returns:
+        dict: {"all_data", "warnings", "seconds"}.
+    """
+    started = time.perf_counter()
+    result = compute_day_data(account_client(name, account), date, account.get('webhook_url'))
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+def build_account_range(
+    name: str,
+    account: Dict[str, Any],
+    start: str,
+    end: str,
+    today_analytics: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Worker: build the date range analytics of one account from its own aggregate store
+    (see build_range_analytics).
+    Returns:
+        dict: {"analytics", "days", "fetched_days", "warnings", "seconds"}.
+    """
+    started = time.perf_counter()
+    result = build_range_analytics(
+        account_client(name, account),
+        start,
+        end,
+        AggregateStore(account_cache_dir(name)),
+        account.get('webhook_url'),
+        today_analytics
+    )
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+def create_account_pool(accounts: Dict[str, Dict[str, Any]]) -> ProcessPoolExecutor:
+    """
+    Create a process pool with one worker per account. Workers are spawned rather than
+    forked, so they do not inherit the locks and threads of a running server.
+    """
+    return ProcessPoolExecutor(max_workers=max(1, len(accounts)), mp_context=multiprocessing.get_context("spawn"))
+
+def run_accounts(
+    accounts: Dict[str, Dict[str, Any]],
+    worker: Callable[..., Dict[str, Any]],
+    args: Dict[str, Tuple[Any, ...]],
+    executor: Optional[Executor] = None
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    Run a worker for every account in parallel.
+    Args:
+        accounts (dict): {account name: account settings}.
+        worker (Callable): Module-level worker function called as worker(name, account, *args).
+        args (dict): Extra worker arguments by account name (missing means none).
+        executor (Executor, optional): Pool to run in (a pool is created for this call if None).
+    Returns:
+        tuple: ({account name: worker result}, {account name: error message} of failed accounts).
+    """
+    pool = executor or create_account_pool(accounts)
+    try:
+        futures = {
+            name: pool.submit(worker, name, account, *args.get(name, ()))
+            for name, account in accounts.items()
+        }
+        results: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = str(e) or type(e).__name__
+                continue
+            metrics.observe("account_refresh_seconds", results[name]['seconds'], account=name)
+        return results, errors
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+def merge_account_data(all_data: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine the analytics and card tables of several accounts.
+    Args:
+        all_data (dict): {account name: {"card_table", "analytics", "count"}}.
+    Returns:
+        dict: {"card_table", "analytics", "count"} of all accounts together, plus
+            "accounts" with the per-account data.
+    """
+    return {
+        'card_table': CardTable.concat(data['card_table'] for data in all_data.values()),
+        'analytics': merge_manager_dicts(data['analytics'] for data in all_data.values()),
+        'count': sum(data['count'] for data in all_data.values()),
+        'accounts': all_data
+    }
+
+def compute_accounts_data(
+    accounts: Dict[str, Dict[str, Any]],
+    previous: Optional[Dict[str, Any]] = None,
+    executor: Optional[Executor] = None
+) -> Dict[str, Any]:
+    """
+    Refresh today's analytics of all accounts in parallel and merge them.
+    An account that fails keeps its previous result (if any) with a warning.
+    Args:
+        accounts (dict): {account name: account settings}.
+        previous (dict, optional): Result of a previous run; each account then refreshes
+            incrementally from its own previous state.
+        executor (Executor, optional): Process pool (see create_account_pool).
+    Returns:
+        dict: {"accounts": {account name: compute_all_data result}, "all_data": merged
+            data with a per-account breakdown, "warnings": list of messages}.
+    """
+    previous_accounts = previous.get('accounts', {}) if previous else {}
+    with metrics.stage("refresh"):
+        results, errors = run_accounts(
+            accounts,
+            compute_account_data,
+            {name: (previous_accounts[name],) for name in accounts if name in previous_accounts},
+            executor
+        )
+    warnings: List[str] = []
+    for name, error in errors.items():
+        if name in previous_accounts:
+            results[name] = previous_accounts[name]
+            warnings.append(f"[{name}] refresh failed, showing the previous result: {error}")
+        else:
+            warnings.append(f"[{name}] refresh failed: {error}")
+    # Keep the configured account order
+    results = {name: results[name] for name in accounts if name in results}
+    for name, result in results.items():
+        warnings.extend(f"[{name}] {message}" for message in result['warnings'] if name not in errors)
+    return {
+        'accounts': results,
+        'all_data': merge_account_data({name: result['all_data'] for name, result in results.items()}),
+        'warnings': warnings
+    }
+
+def compute_accounts_day(
+    accounts: Dict[str, Dict[str, Any]],
+    date: str,
+    executor: Optional[Executor] = None
+) -> Dict[str, Any]:
+    """
+    Build the analytics and cards of all accounts for any day and merge them.
+    Args:
+        accounts (dict): {account name: account settings}.
+        date (str): Day in 'YYYY-MM-DD' format (Kyiv time).
+        executor (Executor, optional): Process pool (see create_account_pool).
+    Returns:
+        dict: {"all_data": merged data with a per-account breakdown, "warnings": list of messages}.
+    Raises:
+        RuntimeError: If any account failed (an export must not silently miss an account).
+    """
+    results, errors = run_accounts(accounts, compute_account_day, {name: (date,) for name in accounts}, executor)
+    if errors:
+        raise RuntimeError("; ".join(f"[{name}] {error}" for name, error in errors.items()))
+    return {
+        'all_data': merge_account_data({name: results[name]['all_data'] for name in accounts}),
+        'warnings': [f"[{name}] {message}" for name in accounts for message in results[name]['warnings']]
+    }
+
+def build_accounts_range(
+    accounts: Dict[str, Dict[str, Any]],
+    start: str,
+    end: str,
+    executor: Optional[Executor] = None,
+    today: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Build the date range analytics of all accounts in parallel and merge them.
+    Args:
+        accounts (dict): {account name: account settings}.
+        start (str): First day in 'YYYY-MM-DD' format (Kyiv time).
+        end (str): Last day in 'YYYY-MM-DD' format (Kyiv time), inclusive.
+        executor (Executor, optional): Process pool (see create_account_pool).
+        today (dict, optional): Today's result of compute_accounts_data if already
+            available; accounts missing from it fetch today themselves.
+    Returns:
+        dict: {"analytics": combined analytics, "days": number of days, "fetched_days":
+            days fetched from the API by any account, "warnings": list of messages,
+            "accounts": {account name: analytics}}.
+    Raises:
+        RuntimeError: If any account failed.
+    """
+    today_accounts = today.get('accounts', {}) if today else {}
+    results, errors = run_accounts(
+        accounts,
+        build_account_range,
+        {
+            name: (start, end, today_accounts[name]['all_data']['analytics'] if name in today_accounts else None)
+            for name in accounts
+        },
+        executor
+    )
+    if errors:
+        raise RuntimeError("; ".join(f"[{name}] {error}" for name, error in errors.items()))
+    return {
+        'analytics': merge_manager_dicts(results[name]['analytics'] for name in accounts),
+        'days': max((result['days'] for result in results.values()), default=0),
+        'fetched_days': sorted({date for result in results.values() for date in result['fetched_days']}),
+        'warnings': [f"[{name}] {message}" for name in accounts for message in results[name]['warnings']],
+        'accounts': {name: results[name]['analytics'] for name in accounts}
+    }
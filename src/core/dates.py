@@ -0,0 +1,14 @@
+import pytz
+from datetime import datetime
+
+# Kyiv time helpers, kept apart from the pipeline so the app can use them without
+# importing pandas and the API stack
+
+kyiv_tz = pytz.timezone("Europe/Kyiv")
+
+def current_kyiv_date() -> str:
+    """
+    Returns today's date in Kyiv time ('YYYY-MM-DD').
+    Computed per run, so a long-lived server does not keep yesterday's date after midnight.
+    """
+    return datetime.now(kyiv_tz).strftime("%Y-%m-%d")
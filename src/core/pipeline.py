@@ -0,0 +1,530 @@
+import copy
+import pytz
+import pandas as pd
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from config.settings import WEBHOOK_PROD_URL, API_PAGE_LIMIT, CARD_INCLUDE, CALLS_OVERLAP
+from src.api.client import CardLookup, day_range_filter
+from src.api.webhook import get_webhook_client
+from src.core.dates import kyiv_tz, current_kyiv_date
+from src.utils.aggregate_store import AggregateStore
+from src.utils.analytics import add_card_to_dict, build_manager_category_dict, merge_manager_dicts
+from src.utils.card_table import CardTable
+from src.utils.classification import get_classifier
+from src.utils.metrics import metrics
+from src.utils.cards import Card, as_card, normalize_card_id
+
+def created_on_kyiv_date(cards: List[Card], date: str) -> Tuple[List[bool], int]:
+    """
+    Check in one vectorized pass which cards were created on a given Kyiv date.
+    Args:
+        cards (list): Compact cards with UTC created_at timestamps.
+        date (str): Day in 'YYYY-MM-DD' format (Kyiv time).
+    Returns:
+        tuple: (flag per card, True if created on the date; number of missing or
+            unparseable timestamps, which are treated as not created on the date).
+    """
+    if not cards:
+        return [], 0
+    created_at = pd.to_datetime(
+        pd.Series([card.created_at for card in cards], dtype="object"),
+        utc=True,
+        format="ISO8601",
+        errors="coerce"
+    )
+    kyiv_dates = created_at.dt.tz_convert(kyiv_tz).dt.strftime("%Y-%m-%d")
+    return (kyiv_dates == date).tolist(), int(created_at.isna().sum())
+
+def normalize_lead_ids(calls: Iterable[Dict[str, Any]]) -> Set[int]:
+    """
+    Collect lead IDs from calls, keeping only values convertible to int.
+    Args:
+        calls (Iterable[dict]): Calls from KeyCRM API.
+    Returns:
+        set: Unique lead IDs.
+    """
+    normalized_lead_ids: Set[int] = set()
+    for call in calls:
+        lid = normalize_card_id(call.get('lead_id'))
+        if lid is not None:
+            normalized_lead_ids.add(lid)
+    return normalized_lead_ids
+
+def get_card_state(card: Card, webhook_ids: Set[int], created_today: bool) -> Optional[str]:
+    """
+    Returns the analytics state of a card for the refreshed day.
+    Args:
+        card (Card): Compact card.
+        webhook_ids (set): Card IDs received from the webhook (new leads).
+        created_today (bool): Whether the card was created on the refreshed day (Kyiv time).
+    Returns:
+        str or None: "Нові" for webhook leads and cards created that day,
+            "Попередні" for older cards with a call that day, None if the card is skipped.
+    """
+    if card.id in webhook_ids:
+        return "Нові"
+    if not card.manager_id:
+        return None
+    return "Нові" if created_today else "Попередні"
+
+def normalize_timestamp(value: str) -> str:
+    """
+    Returns an API timestamp ('YYYY-MM-DDTHH:MM:SS.ffffffZ' or 'YYYY-MM-DD HH:MM:SS')
+    in the 'YYYY-MM-DD HH:MM:SS' form used by the API date filters.
+    """
+    return value.replace("T", " ")[:19]
+
+def calls_since(state: Dict[str, Any]) -> Optional[str]:
+    """
+    Returns the start of the calls window of an incremental refresh: CALLS_OVERLAP
+    seconds before the last seen call, but not before the start of the day
+    (None for a full refresh).
+    """
+    if not state['last_call_at']:
+        return None
+    since = datetime.strptime(state['last_call_at'], "%Y-%m-%d %H:%M:%S") - timedelta(seconds=CALLS_OVERLAP)
+    return max(f"{since:%Y-%m-%d %H:%M:%S}", f"{state['date']} 00:00:00")
+
+def new_refresh_state(date: str) -> Dict[str, Any]:
+    """
+    Create an empty refresh state for a day.
+    The state holds the high-water marks of the last refresh, the cards seen so far
+    (as compact Card objects) with their analytics state, the IDs of seen leads whose
+    cards could not be fetched yet (retried by the next refresh), the analytics
+    dictionary built from the cards and the classifier it was built with.
+    Args:
+        date (str): Day in 'YYYY-MM-DD' format (Kyiv time).
+    Returns:
+        dict: Empty refresh state.
+    """
+    return {
+        'date': date,
+        'last_call_at': None,
+        'last_refresh_at': None,
+        'call_ids': set(),
+        'webhook_ids': set(),
+        'lead_ids': set(),
+        'pending_ids': set(),
+        'cards': {},
+        'analytics': {},
+        'classifier': get_classifier()
+    }
+
+def apply_card_changes(state: Dict[str, Any], changed: Dict[int, Card]) -> List[str]:
+    """
+    Apply new and changed cards to a refresh state: the previous contribution of each
+    card is removed from the analytics and the current one is added. The cards of a
+    new state (a full build) are counted at once with build_manager_category_dict.
+    Args:
+        state (dict): Refresh state (updated in place).
+        changed (dict): {card ID: current card}.
+    Returns:
+        list: Warning messages for cards with an unparseable creation time.
+    """
+    warnings: List[str] = []
+    # Split changed cards into created that day and earlier in one pass
+    created_today, unparseable = created_on_kyiv_date(list(changed.values()), state['date'])
+    if unparseable:
+        warnings.append(f"{unparseable} cards have a missing or unparseable created_at and were counted as earlier")
+
+    full_build = not state['cards']
+    grouped: Dict[str, List[Card]] = {"Нові": [], "Попередні": []}
+    for (card_id, card), is_today in zip(changed.items(), created_today):
+        previous = state['cards'].pop(card_id, None)
+        if previous and previous[0]:
+            add_card_to_dict(state['analytics'], previous[0], previous[1], sign=-1)
+        card_state = get_card_state(card, state['webhook_ids'], is_today)
+        if card_state and full_build:
+            grouped[card_state].append(card)
+        elif card_state:
+            add_card_to_dict(state['analytics'], card_state, card)
+        state['cards'][card_id] = (card_state, card)
+    if full_build:
+        state['analytics'] = build_manager_category_dict(grouped)
+    return warnings
+
+def refresh_state(
+    api_client,
+    state: Dict[str, Any],
+    webhook_ids: Set[int],
+    prefetched_cards: Optional[List[Union[Card, Dict[str, Any]]]] = None
+) -> List[str]:
+    """
+    Bring a refresh state up to date, fetching only what changed since the last refresh.
+    For an empty state this fetches the whole day. Card payloads are parsed into compact
+    Card objects as soon as they arrive, so the raw JSON is not kept.
+    Args:
+        api_client (ApiClient): KeyCRM API client.
+        state (dict): Refresh state from new_refresh_state (updated in place).
+        webhook_ids (set): Card IDs currently returned by the webhook.
+        prefetched_cards (list, optional): Cards or card payloads already fetched (with
+            CARD_INCLUDE), used as they are instead of being fetched again.
+    Returns:
+        list: Warning messages for cards that could not be fetched.
+    """
+    date: str = state['date']
+    warnings: List[str] = []
+    refresh_started_at = datetime.now(pytz.utc)
+    changed: Dict[int, Card] = {}
+    # Known cards changed since the last refresh
+    if state['last_refresh_at'] and state['cards']:
+        with metrics.stage("updated_cards"):
+            updated = api_client.fetch_all_cards(
+                filters={'updated_between': f"{state['last_refresh_at']}, {refresh_started_at:%Y-%m-%d %H:%M:%S}"},
+                include=CARD_INCLUDE
+            )
+        changed.update({card['id']: Card.from_api(card) for card in updated if card.get('id') in state['cards']})
+
+    def is_new(card_id: int) -> bool:
+        return card_id not in state['cards'] and card_id not in changed
+
+    for card in prefetched_cards or []:
+        card = as_card(card)
+        if card.id is not None and is_new(card.id):
+            changed[card.id] = card
+
+    new_webhook_ids = webhook_ids - state['webhook_ids']
+    state['webhook_ids'] |= new_webhook_ids
+    # Cards of known leads whose fetch failed before are retried first
+    pending = sorted(card_id for card_id in state['pending_ids'] if is_new(card_id))
+    state['pending_ids'] = set()
+    responses: List[Future] = []
+    # Call leads are usually updated today: one list query is shared by all lead batches
+    lead_lookup = CardLookup(api_client, {'updated_between': day_range_filter(date)}, include=CARD_INCLUDE)
+    # Card fetching runs in the background while calls are still being paginated
+    with ThreadPoolExecutor(max_workers=1) as card_stage:
+        try:
+            if pending:
+                responses.append(card_stage.submit(api_client.fetch_cards_by_ids, pending, include=CARD_INCLUDE))
+
+            # Webhook leads are created today
+            webhook_batch = [card_id for card_id in new_webhook_ids if is_new(card_id) and card_id not in pending]
+            if webhook_batch:
+                responses.append(card_stage.submit(
+                    api_client.fetch_cards_bulk,
+                    webhook_batch,
+                    filters={'created_between': day_range_filter(date)},
+                    include=CARD_INCLUDE
+                ))
+
+            # Stream calls since shortly before the last seen call: calls can become visible
+            # late, and calls read again are skipped by ID
+            with metrics.stage("calls"):
+                lead_batch: List[int] = []
+                for call in api_client.iter_calls(date=date, include="", since=calls_since(state)):
+                    if call.get('id') in state['call_ids']:
+                        continue
+                    state['call_ids'].add(call.get('id'))
+                    if call.get('created_at'):
+                        state['last_call_at'] = max(state['last_call_at'] or "", normalize_timestamp(call['created_at']))
+
+                    lead_id = normalize_card_id(call.get('lead_id'))
+                    if lead_id is None or lead_id in state['lead_ids']:
+                        continue
+                    state['lead_ids'].add(lead_id)
+                    if is_new(lead_id) and lead_id not in new_webhook_ids:
+                        lead_batch.append(lead_id)
+                    if len(lead_batch) >= API_PAGE_LIMIT:
+                        responses.append(card_stage.submit(lead_lookup.fetch, lead_batch))
+                        lead_batch = []
+                if lead_batch:
+                    responses.append(card_stage.submit(lead_lookup.fetch, lead_batch))
+
+            # Card batches still running once all calls are read
+            with metrics.stage("cards"):
+                for future in responses:
+                    response = future.result()
+                    changed.update({card['id']: Card.from_api(card) for card in response.get('data', [])})
+                    if response.get('failed_ids'):
+                        # Their calls and webhook entries are already seen: retry the cards next time
+                        state['pending_ids'].update(response['failed_ids'])
+                        warnings.append(response.get('message', ''))
+        finally:
+            for future in responses:
+                future.cancel()
+            lead_lookup.close()
+
+    # Newly known webhook IDs can promote cards already counted as "Попередні"
+    for card_id in new_webhook_ids & state['cards'].keys():
+        changed.setdefault(card_id, state['cards'][card_id][1])
+
+    with metrics.stage("analytics"):
+        warnings.extend(apply_card_changes(state, changed))
+
+    # Overlap with the previous window so updates made during this refresh are not missed
+    state['last_refresh_at'] = f"{refresh_started_at - timedelta(minutes=1):%Y-%m-%d %H:%M:%S}"
+    return warnings
+
+def is_full_card(payload: Dict[str, Any]) -> bool:
+    """
+    Whether a pushed card payload has the relations of CARD_INCLUDE, so it can be
+    counted without fetching the card.
+    """
+    return all(relation in payload for relation in CARD_INCLUDE.split(","))
+
+def apply_events(api_client, state: Dict[str, Any], events: Iterable[Dict[str, Any]]) -> List[str]:
+    """
+    Apply pushed events to a refresh state without listing calls or cards:
+    - "lead": a new lead (as returned by the webhook), counted as "Нові";
+    - "call": a call; its lead is counted like the leads of listed calls;
+    - "card": a created or updated card; only cards already counted for the day
+      are updated, the others are left to the calls and the webhook, as in a pull.
+    Cards pushed without CARD_INCLUDE relations are fetched by ID. The high-water marks
+    are not moved, so the next pull still lists everything pushed events may have missed.
+    Args:
+        api_client (ApiClient): KeyCRM API client (used only for incomplete cards).
+        state (dict): Refresh state of today (updated in place).
+        events (Iterable[dict]): Events from parse_events ({"type", "data"}).
+    Returns:
+        list: Warning messages for cards that could not be fetched.
+    """
+    warnings: List[str] = []
+    changed: Dict[int, Card] = {}
+    to_fetch: Set[int] = set()
+
+    def track(card_id: int, payload: Dict[str, Any]) -> None:
+        if is_full_card(payload):
+            changed[card_id] = Card.from_api(payload)
+            to_fetch.discard(card_id)
+        elif card_id in state['cards']:
+            # Re-evaluate the known card (e.g. a lead promoted to "Нові")
+            changed.setdefault(card_id, state['cards'][card_id][1])
+        elif card_id not in changed:
+            to_fetch.add(card_id)
+
+    for event in events:
+        data = event['data']
+        if event['type'] == "call":
+            if data.get('id') is not None:
+                if data['id'] in state['call_ids']:
+                    continue
+                state['call_ids'].add(data['id'])
+            lead_id = normalize_card_id(data.get('lead_id'))
+            if lead_id is None or lead_id in state['lead_ids']:
+                continue
+            state['lead_ids'].add(lead_id)
+            if lead_id not in state['cards']:
+                track(lead_id, {})
+        elif event['type'] == "lead":
+            card_id = normalize_card_id(data.get('card_id', data.get('id')))
+            if card_id is None:
+                continue
+            state['webhook_ids'].add(card_id)
+            track(card_id, data)
+        else:
+            card_id = normalize_card_id(data.get('id'))
+            if card_id in state['cards'] or card_id in state['pending_ids'] or card_id in changed or card_id in to_fetch:
+                track(card_id, data)
+    metrics.increment("push_cards_fetched_total", len(to_fetch))
+
+    if to_fetch:
+        # Not from the card cache: an updated card must be fetched as it is now
+        response = api_client.fetch_cards_by_ids(sorted(to_fetch), include=CARD_INCLUDE, use_cache=False)
+        changed.update({card['id']: Card.from_api(card) for card in response.get('data', [])})
+        if response.get('failed_ids'):
+            # The leads are already marked as seen: the next pull retries their cards
+            state['pending_ids'].update(response['failed_ids'])
+            warnings.append(f"{len(response['failed_ids'])} pushed cards could not be fetched")
+    warnings.extend(apply_card_changes(state, changed))
+    return warnings
+
+def snapshot_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Publish the results of a refresh state. The state keeps changing on later refreshes,
+    so this is a copy of the analytics and a compact table of the displayed card fields.
+    Args:
+        state (dict): Refresh state.
+    Returns:
+        dict: {"card_table": CardTable, "analytics": nested analytics, "count": number of cards}.
+    """
+    # "Нові": cards created that day (from webhook and calls)
+    # "Попередні": cards with a call that day, but not created that day
+    cards_new_final = [card for card_state, card in state['cards'].values() if card_state == "Нові"]
+    cards_calls_final = [card for card_state, card in state['cards'].values() if card_state == "Попередні"]
+
+    # Combine all cards into one list
+    all_cards = cards_new_final + cards_calls_final
+    return {
+        'card_table': CardTable.from_cards(all_cards),
+        'analytics': copy.deepcopy(state['analytics']),
+        'count': len(all_cards)
+    }
+
+def compute_all_data(
+    api_client,
+    webhook_url: Optional[str] = WEBHOOK_PROD_URL,
+    previous: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Fetch new leads from webhook + calls from KeyCRM API and build analytics for today.
+    Args:
+        api_client (ApiClient): KeyCRM API client.
+        webhook_url (str, optional): Webhook URL to fetch new leads (None: new leads are
+            only taken from the calls).
+        previous (dict, optional): Result of a previous run; if it is for the same day,
+            only new calls and new or changed cards are fetched.
+    Returns:
+        dict: {"state": refresh state, "all_data": {"card_table", "analytics", "count"},
+            "warnings": list of messages}.
+    """
+    with metrics.stage("refresh"):
+        warnings: List[str] = []
+        webhook_ids: Set[int] = set()
+        if webhook_url:
+            # Fetch new leads from webhook (unchanged lead lists are answered with 304)
+            with metrics.stage("webhook"):
+                webhook = get_webhook_client(webhook_url).fetch_card_ids()
+            if webhook['empty']:
+                warnings.append("No new leads from webhook")
+            webhook_ids = webhook['card_ids']
+
+        today = current_kyiv_date()
+        state = previous['state'] if previous else None
+        # Start over on a new day or when the classification changed (e.g. new pipelines);
+        # compared by value, as states may come back pickled from a worker process
+        if state is None or state['date'] != today or state['classifier'] != get_classifier():
+            state = new_refresh_state(today)
+        warnings.extend(refresh_state(api_client, state, webhook_ids))
+        with metrics.stage("card_table"):
+            all_data = snapshot_state(state)
+
+    return {
+        'state': state,
+        'all_data': all_data,
+        'warnings': warnings
+    }
+
+def compute_pushed_data(
+    api_client,
+    events: List[Dict[str, Any]],
+    previous: Optional[Dict[str, Any]] = None,
+    webhook_url: Optional[str] = WEBHOOK_PROD_URL
+) -> Dict[str, Any]:
+    """
+    Apply pushed events to the previous result of today (see apply_events). Without a
+    usable previous result (none yet, a new day or a changed classification) today is
+    pulled in full instead, which already includes the pushed changes.
+    Args:
+        api_client (ApiClient): KeyCRM API client.
+        events (list): Events from parse_events.
+        previous (dict, optional): Result of a previous run.
+        webhook_url (str, optional): Webhook URL for a full pull.
+    Returns:
+        dict: {"state": refresh state, "all_data": {"card_table", "analytics", "count"},
+            "warnings": list of messages}.
+    """
+    state = previous['state'] if previous else None
+    if state is None or state['date'] != current_kyiv_date() or state['classifier'] != get_classifier():
+        return compute_all_data(api_client, webhook_url)
+    with metrics.stage("push"):
+        warnings = apply_events(api_client, state, events)
+        all_data = snapshot_state(state)
+    return {
+        'state': state,
+        'all_data': all_data,
+        'warnings': warnings
+    }
+
+def compute_day_state(api_client, date: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Build the refresh state of a past day. The webhook only knows today's leads, so the
+    cards created that day stand in for them as "Нові".
+    Args:
+        api_client (ApiClient): KeyCRM API client.
+        date (str): Day in 'YYYY-MM-DD' format (Kyiv time).
+    Returns:
+        tuple: (refresh state of the day, warning messages). Cards that could not be
+            fetched are left in the state's 'pending_ids'.
+    """
+    created = [Card.from_api(card) for card in api_client.fetch_all_cards(
+        filters={'created_between': day_range_filter(date)},
+        include=CARD_INCLUDE
+    )]
+    created_today, _ = created_on_kyiv_date(created, date)
+    created = [card for card, is_today in zip(created, created_today) if is_today]
+    state = new_refresh_state(date)
+    warnings = refresh_state(
+        api_client,
+        state,
+        {card.id for card in created if card.id is not None},
+        prefetched_cards=created
+    )
+    return state, warnings
+
+def compute_day_data(api_client, date: str, webhook_url: str = WEBHOOK_PROD_URL) -> Dict[str, Any]:
+    """
+    Build analytics and the cards table of any day: today from the webhook and calls,
+    past days from compute_day_state.
+    Args:
+        api_client (ApiClient): KeyCRM API client.
+        date (str): Day in 'YYYY-MM-DD' format (Kyiv time).
+        webhook_url (str): Webhook URL to fetch today's new leads.
+    Returns:
+        dict: {"all_data": {"card_table", "analytics", "count"}, "warnings": list of messages}.
+    """
+    if date == current_kyiv_date():
+        result = compute_all_data(api_client, webhook_url)
+        return {'all_data': result['all_data'], 'warnings': result['warnings']}
+    state, warnings = compute_day_state(api_client, date)
+    return {'all_data': snapshot_state(state), 'warnings': warnings}
+
+def build_range_analytics(
+    api_client,
+    start: str,
+    end: str,
+    store: AggregateStore,
+    webhook_url: str = WEBHOOK_PROD_URL,
+    today_analytics: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Build analytics for a date range from stored per-day aggregates, fetching only
+    the days that are not stored yet. Finished days are stored after they are fetched,
+    unless some of their cards could not be fetched (they are fetched again next time);
+    today is never stored.
+    Args:
+        api_client (ApiClient): KeyCRM API client.
+        start (str): First day in 'YYYY-MM-DD' format (Kyiv time).
+        end (str): Last day in 'YYYY-MM-DD' format (Kyiv time), inclusive.
+        store (AggregateStore): Store of finished days' analytics.
+        webhook_url (str): Webhook URL to fetch today's new leads.
+        today_analytics (dict, optional): Today's analytics if already available (e.g.
+            from the shared analytics cache); fetched when None and the range includes today.
+    Returns:
+        dict: {"analytics": combined analytics, "days": number of days,
+            "fetched_days": days fetched from the API, "warnings": list of messages}.
+    """
+    today = current_kyiv_date()
+    dates = [
+        day.strftime("%Y-%m-%d")
+        for day in pd.date_range(start, min(end, today), freq="D")
+    ]
+    per_day = store.get_days(date for date in dates if date != today)
+    if today in dates and today_analytics is not None:
+        per_day[today] = today_analytics
+    fetched_days: List[str] = []
+    warnings: List[str] = []
+    for date in dates:
+        if date in per_day:
+            continue
+        if date == today:
+            result = compute_all_data(api_client, webhook_url)
+            per_day[date] = result['all_data']['analytics']
+            warnings.extend(f"{date}: {message}" for message in result['warnings'])
+        else:
+            state, day_warnings = compute_day_state(api_client, date)
+            per_day[date] = state['analytics']
+            warnings.extend(f"{date}: {message}" for message in day_warnings)
+            # A day with missing cards is not stored, so the next report fetches it again
+            if state['pending_ids']:
+                warnings.append(f"{date}: {len(state['pending_ids'])} cards are missing, the day is not stored")
+            else:
+                store.put_day(date, per_day[date])
+        fetched_days.append(date)
+
+    return {
+        'analytics': merge_manager_dicts(per_day[date] for date in dates),
+        'days': len(dates),
+        'fetched_days': fetched_days,
+        'warnings': warnings
+    }
@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from config.settings import CACHE_DIR
+from src.utils.analytics import NOT_QUALIFIED_LABEL, empty_category_stats
+
+
+class AggregateStore:
+    """
+    SQLite store of finished days' analytics as compact rows keyed by
+    (date, manager, category, state, metric). The state is "Нові"/"Попередні" for
+    the hot counters and empty for per-category counters.
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR) -> None:
+        """
+        Initialize aggregate store.
+        Args:
+            cache_dir (str): Directory for the SQLite database file.
+        """
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.path: Path = Path(cache_dir) / "aggregates.sqlite3"
+        self.lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS day_aggregates ("
+                " date TEXT NOT NULL,"
+                " manager TEXT NOT NULL,"
+                " category TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " metric TEXT NOT NULL,"
+                " value INTEGER NOT NULL,"
+                " PRIMARY KEY (date, manager, category, state, metric))"
+            )
+            # Days are recorded separately so that days without any card are not refetched
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS days ("
+                " date TEXT PRIMARY KEY,"
+                " stored_at REAL NOT NULL)"
+            )
+            # Days stored before the not qualified counter's key was spelled like its column
+            conn.execute(
+                "UPDATE day_aggregates SET metric = ? WHERE metric = ?",
+                (NOT_QUALIFIED_LABEL, "Не квалифіковані")
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def stored_days(self, dates: Iterable[str]) -> List[str]:
+        """
+        Returns the given dates that are already stored.
+        """
+        dates = list(dates)
+        if not dates:
+            return []
+        placeholders = ",".join("?" * len(dates))
+        with self.lock, self._connect() as conn:
+            rows = conn.execute(f"SELECT date FROM days WHERE date IN ({placeholders})", dates).fetchall()
+        return [row[0] for row in rows]
+
+    def put_day(self, date: str, manager_dict: Dict[str, Any]) -> None:
+        """
+        Store (or replace) one finished day's analytics.
+        Args:
+            date (str): Day in 'YYYY-MM-DD' format.
+            manager_dict (dict): Nested analytics by manager and category.
+        """
+        rows: List[Tuple[str, str, str, str, str, int]] = []
+        for manager_key, categories in manager_dict.items():
+            for category, stats in categories.items():
+                for key, value in stats.items():
+                    if isinstance(value, dict):
+                        rows.extend((date, manager_key, category, key, prog, count) for prog, count in value.items())
+                    else:
+                        rows.append((date, manager_key, category, "", key, value))
+        with self.lock, self._connect() as conn:
+            conn.execute("DELETE FROM day_aggregates WHERE date = ?", (date,))
+            conn.executemany("INSERT INTO day_aggregates VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO days VALUES (?, ?)", (date, time.time()))
+
+    def get_days(self, dates: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Load stored days' analytics.
+        Args:
+            dates (Iterable[str]): Days in 'YYYY-MM-DD' format.
+        Returns:
+            dict: {date: nested analytics} for the stored days.
+        """
+        stored = self.stored_days(dates)
+        result: Dict[str, Dict[str, Any]] = {date: {} for date in stored}
+        if not stored:
+            return result
+        placeholders = ",".join("?" * len(stored))
+        with self.lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT date, manager, category, state, metric, value FROM day_aggregates"
+                f" WHERE date IN ({placeholders}) ORDER BY rowid",
+                stored
+            ).fetchall()
+        for date, manager_key, category, state, metric, value in rows:
+            stats = result[date].setdefault(manager_key, {}).setdefault(category, empty_category_stats())
+            if state:
+                stats[state][metric] = value
+            else:
+                stats[metric] = value
+        return result
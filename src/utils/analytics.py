@@ -1,4 +1,20 @@
-from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
+from operator import attrgetter
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
+from config.settings import CUSTOM_KEYS
+from src.utils.cards import Card, as_card
+from src.utils.classification import (
+    get_classifier, HOT_FIELD_BIT, QUALIFIED_FIELD_BIT, CUSTOM_KEY_BITS
+)
+
+STATE_COLUMNS: List[Tuple[str, str]] = [
+    ("Нові", "Прогріті"), ("Нові", "Не прогріті"),
+    ("Попередні", "Прогріті"), ("Попередні", "Не прогріті")
+]
+TOTAL_LABEL = "Всього"
+# Analytics key and table header of the not qualified cards counter
+NOT_QUALIFIED_LABEL = "Не кваліфіковані"
 
 
 def define_category(pipeline_id: int) -> Optional[str]:
@@ -9,79 +25,223 @@ def define_category(pipeline_id: int) -> Optional[str]:
     Returns:
         str or None: Category name ('Алмази', 'Діаманти', 'Не Алмази') or None if not found.
     """
-    if pipeline_id in [1, 4, 7, 10, 13]:
-        return "Алмази"
-    elif pipeline_id in [2, 5, 8, 11, 14]:
-        return "Діаманти"
-    elif pipeline_id in [0, 3, 6, 9, 12, 15, 16]:
-        return "Не Алмази"
-    return None
+    return get_classifier().category(pipeline_id)
+
+
+def empty_category_stats() -> Dict[str, Any]:
+    """
+    Returns zeroed counters of one manager/category entry.
+    """
+    stats: Dict[str, Any] = {
+        "Нові": {"Прогріті": 0, "Не прогріті": 0},
+        "Попередні": {"Прогріті": 0, "Не прогріті": 0},
+        NOT_QUALIFIED_LABEL: 0
+    }
+    for key in CUSTOM_KEYS:
+        stats[key] = 0
+    return stats
+
+
+def add_card_to_dict(
+    result: Dict[str, Any],
+    state: str,
+    card: Union[Card, Dict[str, Any]],
+    sign: int = 1
+) -> None:
+    """
+    Add (or, with sign=-1, remove) one card's contribution to the analytics dictionary in place.
+    Categories and managers left without cards after a removal are dropped, so the result
+    matches a dictionary built from scratch.
+    Args:
+        result (dict): Nested analytics by manager and category.
+        state (str): Card state ("Нові" or "Попередні").
+        card (Card or dict): Compact card (raw card data is parsed first).
+        sign (int): 1 to add the card, -1 to remove it.
+    """
+    card = as_card(card)
+    if card.pipeline_id is None:
+        return
+    classifier = get_classifier()
+    category = classifier.category(card.pipeline_id)
+    if not category:
+        return
+    manager_key = card.manager_key
+    profession_priority = category
+    status_id = card.status_id
+    flags = card.flags
+    prog = "Прогріті" if classifier.is_hot(status_id, flags) else "Не прогріті"
+
+    # Initialize structure for manager/category if not exists
+    if manager_key not in result:
+        result[manager_key] = {}
+    if profession_priority not in result[manager_key]:
+        result[manager_key][profession_priority] = empty_category_stats()
+    stats = result[manager_key][profession_priority]
 
+    # Increment counts for Нові/Попередні
+    stats[state][prog] += sign
+    # Increment counts for custom fields
+    for key in CUSTOM_KEYS:
+        if flags & CUSTOM_KEY_BITS[key]:
+            stats[key] += sign
 
-def build_manager_category_dict(cards: Dict[str, List[Dict]]) -> Dict[str, Any]:
+    # Logic for "Не кваліфіковані"
+    if classifier.is_not_qualified(status_id, flags):
+        stats[NOT_QUALIFIED_LABEL] += sign
+
+    # Drop entries that no longer hold any card
+    if sign < 0 and not any(sum(stats[s].values()) for s in ("Нові", "Попередні")):
+        del result[manager_key][profession_priority]
+        if not result[manager_key]:
+            del result[manager_key]
+
+
+def _categorical(values: List[Any]) -> pd.Categorical:
+    """
+    Encode repeated labels (None as missing) without building a string column.
+    """
+    codes, labels = pd.factorize(np.array(values, dtype=object))
+    return pd.Categorical.from_codes(codes, labels)
+
+
+def cards_to_frame(cards: Dict[str, List[Union[Card, Dict]]]) -> pd.DataFrame:
+    """
+    Flatten cards once into a columnar frame with one row per classified card.
+    Fields are read with map() passes instead of a Python loop per card, and the
+    manager, category and state labels are stored as categoricals.
+    Args:
+        cards (dict): {"Нові": [...], "Попередні": [...]} of compact cards (raw card data is parsed first).
+    Returns:
+        pd.DataFrame: Columns 'manager', 'category', 'state', 'hot', 'not_qualified'
+            and one boolean column per custom key.
+    """
+    state_lists = [list(map(as_card, state_cards)) for state_cards in cards.values()]
+    card_list: List[Card] = [card for state_cards in state_lists for card in state_cards]
+    count = len(card_list)
+    classifier = get_classifier()
+    status_ids = list(map(attrgetter("status_id"), card_list))
+    card_flags = np.fromiter(map(attrgetter("flags"), card_list), dtype=np.int64, count=count)
+    hot_status = np.fromiter(map(classifier.hot_status_ids.__contains__, status_ids), dtype=bool, count=count)
+    not_qualified_status = np.fromiter(
+        map(classifier.not_qualified_status_ids.__contains__, status_ids), dtype=bool, count=count
+    )
+    categories = map(classifier.pipeline_categories.get, map(attrgetter("pipeline_id"), card_list))
+    frame = pd.DataFrame({
+        "manager": _categorical(list(map(attrgetter("manager_key"), card_list))),
+        "category": _categorical(list(categories)),
+        "state": pd.Categorical.from_codes(
+            np.repeat(np.arange(len(state_lists)), [len(state_cards) for state_cards in state_lists]),
+            list(cards)
+        ),
+        "hot": (card_flags & HOT_FIELD_BIT).astype(bool) | hot_status,
+        "not_qualified": ~(card_flags & QUALIFIED_FIELD_BIT).astype(bool) | not_qualified_status,
+        **{key: (card_flags & CUSTOM_KEY_BITS[key]).astype(bool) for key in CUSTOM_KEYS}
+    })
+    # Cards of pipelines outside the categories are not counted
+    return frame[frame["category"].notna()]
+
+
+def build_manager_category_dict(cards: Dict[str, List[Union[Card, Dict]]]) -> Dict[str, Any]:
     """
     Builds a summary dictionary by manager and category.
+    Cards are flattened into a frame and counted with a single groupby; the result is
+    the same as folding every card in with add_card_to_dict, which is kept for
+    incremental changes.
     Args:
-        cards (dict): {"Нові": [...], "Попередні": [...]}
+        cards (dict): {"Нові": [...], "Попередні": [...]} of compact cards (raw card data is parsed first).
     Returns:
         dict: Nested analytics by manager and category.
     """
+    frame = cards_to_frame(cards)
+    result: Dict[str, Any] = {}
+    if frame.empty:
+        return result
+
+    is_new = (frame["state"] == "Нові").to_numpy()
+    is_old = (frame["state"] == "Попередні").to_numpy()
+    hot = frame["hot"].to_numpy()
+    counts = pd.DataFrame({
+        "manager": frame["manager"],
+        "category": frame["category"],
+        "new_hot": is_new & hot,
+        "new_cold": is_new & ~hot,
+        "old_hot": is_old & hot,
+        "old_cold": is_old & ~hot,
+        "not_qualified": frame["not_qualified"],
+        **{key: frame[key] for key in CUSTOM_KEYS}
+    })
+    # sort=False keeps managers and categories in order of first appearance
+    table = counts.groupby(["manager", "category"], sort=False, observed=True).sum()
+
+    for (manager_key, category), row in zip(table.index.tolist(), table.to_numpy().tolist()):
+        new_hot, new_cold, old_hot, old_cold, not_qualified, *custom_counts = row
+        stats: Dict[str, Any] = {
+            "Нові": {"Прогріті": new_hot, "Не прогріті": new_cold},
+            "Попередні": {"Прогріті": old_hot, "Не прогріті": old_cold},
+            NOT_QUALIFIED_LABEL: not_qualified
+        }
+        stats.update(zip(CUSTOM_KEYS, custom_counts))
+        result.setdefault(manager_key, {})[category] = stats
+    return result
+
+
+def merge_manager_dicts(dicts: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Sum several analytics dictionaries (e.g. per-day results) into one.
+    Args:
+        dicts (Iterable[dict]): Nested analytics by manager and category.
+    Returns:
+        dict: Combined analytics; managers and categories in order of first appearance.
+    """
     result: Dict[str, Any] = {}
-    custom_keys: List[str] = [
-        "Закр. Зустріч КИЇВ",
-        "Закр. Навчання В ЗАПИСІ",
-        "Закр. Зустріч ONLINE"
+    for manager_dict in dicts:
+        for manager_key, categories in manager_dict.items():
+            for category, stats in categories.items():
+                target = result.setdefault(manager_key, {}).setdefault(category, empty_category_stats())
+                for key, value in stats.items():
+                    if isinstance(value, dict):
+                        for prog, count in value.items():
+                            target[key][prog] = target[key].get(prog, 0) + count
+                    else:
+                        target[key] = target.get(key, 0) + value
+    return result
+
+
+def build_manager_table_frame(manager_dict: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Build one table of all managers and categories, including 'Всього' totals per manager.
+    Table headers and labels are in Ukrainian.
+    Args:
+        manager_dict (dict): Nested analytics by manager and category.
+    Returns:
+        pd.DataFrame: Rows indexed by (manager, category) and two-level column headers.
+    """
+    columns = pd.MultiIndex.from_tuples(
+        STATE_COLUMNS + [(NOT_QUALIFIED_LABEL, "")] + [(key, "") for key in CUSTOM_KEYS]
+    )
+    managers = list(manager_dict)
+    if not managers:
+        return pd.DataFrame(columns=columns)
+
+    values = [
+        [stats[state][prog] for state, prog in STATE_COLUMNS]
+        + [stats.get(NOT_QUALIFIED_LABEL, 0)]
+        + [stats.get(key, 0) for key in CUSTOM_KEYS]
+        for manager in managers
+        for stats in manager_dict[manager].values()
     ]
-    not_qualified_status_ids = {341, 386, 396, 435}
-    hot_status_ids = {344, 437, 398}
-
-    for state, card_list in cards.items():
-        for card in card_list:
-            manager = card.get('manager', {})
-            status_id = card.get('status_id')
-            manager_key = f"{manager.get('first_name', 'N/A')} {manager.get('last_name', 'N/A')}"
-            pipeline_id = card.get('pipeline_id')
-            if not isinstance(pipeline_id, int):
-                continue
-            category = define_category(pipeline_id)
-            if not category:
-                continue
-            profession_priority = category
-
-            custom_fields = card.get('custom_fields', [])
-            hot_contact = False
-            kvalifikovanyi = False
-            custom_values = {key: False for key in custom_keys}
-            for field in custom_fields:
-                if field.get('name') == 'ПРОГРІТИЙ (готовий працювати)':
-                    hot_contact = field.get('value', False)
-                if field.get('name') == "Кваліфікований повністю":
-                    kvalifikovanyi = field.get('value', False)
-                if field.get('name') in custom_keys:
-                    custom_values[field.get('name')] = field.get('value', False)
-            prog = "Прогріті" if hot_contact or status_id in hot_status_ids else "Не прогріті"
-
-            # Initialize structure for manager/category if not exists
-            if manager_key not in result:
-                result[manager_key] = {}
-            if profession_priority not in result[manager_key]:
-                result[manager_key][profession_priority] = {
-                    "Нові": {"Прогріті": 0, "Не прогріті": 0},
-                    "Попередні": {"Прогріті": 0, "Не прогріті": 0},
-                    "Не квалифіковані": 0
-                }
-                for key in custom_keys:
-                    result[manager_key][profession_priority][key] = 0
-
-            # Increment counts for Нові/Попередні
-            result[manager_key][profession_priority][state][prog] += 1
-            # Increment counts for custom fields
-            for key in custom_keys:
-                if custom_values[key]:
-                    result[manager_key][profession_priority][key] += 1
-
-            # Logic for "Не квалифіковані"
-            if not kvalifikovanyi or (status_id in not_qualified_status_ids):
-                result[manager_key][profession_priority]["Не квалифіковані"] += 1
-
-    return result
\ No newline at end of file
+    index = pd.MultiIndex.from_tuples(
+        [(manager, category) for manager in managers for category in manager_dict[manager]]
+    )
+    frame = pd.DataFrame(values, index=index, columns=columns, dtype="int64")
+
+    # Every manager gets every category (missing ones are zero) and a totals row
+    categories = get_classifier().categories
+    frame = frame.reindex(pd.MultiIndex.from_product([managers, categories]), fill_value=0)
+    totals = frame.groupby(level=0, sort=False).sum()
+    totals.index = pd.MultiIndex.from_product([totals.index, [TOTAL_LABEL]])
+    frame = pd.concat([frame, totals]).reindex(
+        pd.MultiIndex.from_product([managers, categories + [TOTAL_LABEL]])
+    )
+    frame.index.names = ["Менеджер", "Категорія"]
+    return frame
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from src.utils.cards import Card, as_card
+from src.utils.classification import get_classifier
+
+# Displayed columns of the cards table
+DISPLAY_COLUMNS: List[str] = ['ID', 'Назва', 'Контакт', 'Телефон', 'Статус', 'Менеджер', 'Створено']
+
+
+def card_display_row(card: Union[Card, Dict[str, Any]]) -> Tuple[Any, ...]:
+    """
+    Extract the displayed fields of a card, in DISPLAY_COLUMNS order.
+    Args:
+        card (Card or dict): Compact card (raw card data is parsed first).
+    Returns:
+        tuple: Displayed values.
+    """
+    card = as_card(card)
+    return (
+        card.id,
+        card.title,
+        card.contact_name,
+        card.contact_phone,
+        card.status_name,
+        card.manager_name,
+        card.created_at,
+    )
+
+
+class CardTable:
+    """
+    Compact columnar store of the cards table: only the displayed fields plus the
+    manager and category used for filtering, one array per column.
+    """
+    def __init__(self, columns: Dict[str, np.ndarray], categories: np.ndarray) -> None:
+        """
+        Initialize card table.
+        Args:
+            columns (dict): {column name: array} for DISPLAY_COLUMNS.
+            categories (np.ndarray): Category of each row ('' if not classified).
+        """
+        self.columns: Dict[str, np.ndarray] = columns
+        self.categories: np.ndarray = categories
+
+    @classmethod
+    def from_cards(cls, cards: Iterable[Union[Card, Dict[str, Any]]]) -> "CardTable":
+        """
+        Build the table from cards, keeping only the displayed fields.
+        Args:
+            cards (Iterable[Card or dict]): Compact cards (raw card data is parsed first).
+        Returns:
+            CardTable: Columnar table.
+        """
+        rows: List[Tuple[Any, ...]] = []
+        categories: List[str] = []
+        classifier = get_classifier()
+        for card in cards:
+            card = as_card(card)
+            rows.append(card_display_row(card))
+            categories.append(classifier.category(card.pipeline_id) or '')
+        values = list(zip(*rows)) if rows else [()] * len(DISPLAY_COLUMNS)
+        columns = {name: np.array(column, dtype=object) for name, column in zip(DISPLAY_COLUMNS, values)}
+        return cls(columns, np.array(categories, dtype=object))
+
+    @classmethod
+    def concat(cls, tables: Iterable["CardTable"]) -> "CardTable":
+        """
+        Join several tables (e.g. of different KeyCRM accounts) into one.
+        Args:
+            tables (Iterable[CardTable]): Tables to join, in row order.
+        Returns:
+            CardTable: Columnar table with the rows of all tables.
+        """
+        tables = list(tables)
+        if not tables:
+            return cls.from_cards([])
+        columns = {name: np.concatenate([table.columns[name] for table in tables]) for name in DISPLAY_COLUMNS}
+        return cls(columns, np.concatenate([table.categories for table in tables]))
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def managers(self) -> List[str]:
+        """
+        Returns sorted manager names present in the table.
+        """
+        return sorted({str(name) for name in self.columns['Менеджер']})
+
+    def filter(self, manager: Optional[str] = None, category: Optional[str] = None) -> np.ndarray:
+        """
+        Returns row positions matching the filters (None means no filter).
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if manager is not None:
+            mask &= self.columns['Менеджер'] == manager
+        if category is not None:
+            mask &= self.categories == category
+        return np.flatnonzero(mask)
+
+    def to_frame(self, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Build a DataFrame for the given row positions only (all rows if None).
+        """
+        if rows is None:
+            return pd.DataFrame(self.columns, columns=DISPLAY_COLUMNS)
+        return pd.DataFrame({name: column[rows] for name, column in self.columns.items()}, columns=DISPLAY_COLUMNS)
+
+    def page(self, rows: np.ndarray, page: int, page_size: int) -> pd.DataFrame:
+        """
+        Build a DataFrame for one page of the given row positions.
+        Args:
+            rows (np.ndarray): Row positions (e.g. from filter()).
+            page (int): Page number, starting at 1.
+            page_size (int): Rows per page.
+        Returns:
+            pd.DataFrame: Visible rows only.
+        """
+        start = (page - 1) * page_size
+        return self.to_frame(rows[start:start + page_size])
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+from src.utils.classification import get_classifier
+
+
+@dataclass(slots=True)
+class Card:
+    """
+    Compact card holding only the fields used by analytics and tables.
+    Custom fields are reduced to a classification bitmask while parsing,
+    and the rest of the KeyCRM payload is discarded.
+    """
+    id: Optional[int]
+    pipeline_id: Optional[int]
+    status_id: Optional[int]
+    manager_id: Optional[int]
+    manager_key: str
+    manager_name: str
+    created_at: Optional[str]
+    updated_at: Optional[str]
+    flags: int
+    title: Optional[str] = None
+    contact_name: str = 'N/A'
+    contact_phone: str = 'N/A'
+    status_name: str = 'N/A'
+
+    @classmethod
+    def from_api(cls, card: Dict[str, Any]) -> "Card":
+        """
+        Parse a raw KeyCRM card payload.
+        Args:
+            card (dict): Card data from KeyCRM API.
+        Returns:
+            Card: Compact card.
+        """
+        manager = card.get('manager') or {}
+        contact = card.get('contact') or {}
+        status = card.get('status') or {}
+        pipeline_id = card.get('pipeline_id')
+        return cls(
+            id=card.get('id'),
+            pipeline_id=pipeline_id if isinstance(pipeline_id, int) else None,
+            status_id=card.get('status_id'),
+            manager_id=card.get('manager_id'),
+            manager_key=f"{manager.get('first_name', 'N/A')} {manager.get('last_name', 'N/A')}",
+            manager_name=manager.get('full_name', 'N/A') if manager else 'N/A',
+            created_at=card.get('created_at'),
+            updated_at=card.get('updated_at'),
+            flags=get_classifier().field_flags(card.get('custom_fields') or []),
+            title=card.get('title'),
+            contact_name=contact.get('full_name', 'N/A') if contact else 'N/A',
+            contact_phone=contact.get('phone', 'N/A') if contact else 'N/A',
+            status_name=status.get('name', 'N/A') if status else 'N/A'
+        )
+
+
+def as_card(card: Union[Card, Dict[str, Any]]) -> Card:
+    """
+    Returns the card as a compact Card, parsing raw payloads.
+    """
+    return card if isinstance(card, Card) else Card.from_api(card)
+
+
+def normalize_card_id(value: Any) -> Optional[int]:
+    """
+    Convert a card ID (e.g. a call's lead_id or a webhook card_id) to int.
+    Args:
+        value (Any): Card ID as received.
+    Returns:
+        int or None: Card ID, or None if the value is not convertible to int.
+    """
+    if value is None:
+        return None
+    try:
+        # Pass an int directly or convert other values to str first to satisfy type checkers
+        if isinstance(value, int):
+            return value
+        return int(str(value))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,152 @@
+from typing import Any, Dict, Iterable, List, Optional
+from config.settings import (
+    CATEGORY_PIPELINES, HOT_STATUS_IDS, NOT_QUALIFIED_STATUS_IDS, CATEGORY_PIPELINE_KEYWORDS,
+    HOT_STATUS_NAMES, NOT_QUALIFIED_STATUS_NAMES,
+    HOT_FIELD_NAME, QUALIFIED_FIELD_NAME, CUSTOM_KEYS, CUSTOM_FIELD_UUIDS
+)
+
+# Bit positions of the custom field flags
+HOT_FIELD_BIT = 1
+QUALIFIED_FIELD_BIT = 2
+CUSTOM_KEY_BITS: Dict[str, int] = {key: 4 << index for index, key in enumerate(CUSTOM_KEYS)}
+
+
+class Classifier:
+    """
+    Precompiled card classification tables: pipeline -> category, status sets and
+    custom field name/UUID -> bitmask position. Built once, so classifying a card
+    costs a few dict and set lookups.
+    """
+    def __init__(
+        self,
+        category_pipelines: Dict[str, Iterable[int]],
+        hot_status_ids: Iterable[int],
+        not_qualified_status_ids: Iterable[int],
+        field_uuids: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Initialize classifier.
+        Args:
+            category_pipelines (dict): {category: [pipeline_id, ...]}.
+            hot_status_ids (Iterable[int]): Status IDs that make a card "Прогріті".
+            not_qualified_status_ids (Iterable[int]): Status IDs that make a card "Не кваліфіковані".
+            field_uuids (dict, optional): {field name: field UUID} for fields matched by UUID.
+        """
+        self.pipeline_categories: Dict[int, str] = {
+            pipeline_id: category
+            for category, pipeline_ids in category_pipelines.items()
+            for pipeline_id in pipeline_ids
+        }
+        self.categories: List[str] = list(category_pipelines)
+        self.hot_status_ids = frozenset(hot_status_ids)
+        self.not_qualified_status_ids = frozenset(not_qualified_status_ids)
+
+        name_bits: Dict[str, int] = {
+            HOT_FIELD_NAME: HOT_FIELD_BIT,
+            QUALIFIED_FIELD_NAME: QUALIFIED_FIELD_BIT,
+            **CUSTOM_KEY_BITS
+        }
+        self.field_bits: Dict[str, int] = dict(name_bits)
+        for name, uuid in (field_uuids or {}).items():
+            if name in name_bits and uuid:
+                self.field_bits[uuid] = name_bits[name]
+
+    @classmethod
+    def from_settings(cls) -> "Classifier":
+        """
+        Build the classifier from config/settings.py.
+        """
+        return cls(CATEGORY_PIPELINES, HOT_STATUS_IDS, NOT_QUALIFIED_STATUS_IDS, CUSTOM_FIELD_UUIDS)
+
+    @classmethod
+    def from_metadata(cls, metadata: Dict[str, Any]) -> "Classifier":
+        """
+        Build the classifier from pipeline and status metadata. The ID lists from
+        config/settings.py are kept; pipelines and statuses they do not cover are
+        classified by title/name (CATEGORY_PIPELINE_KEYWORDS, HOT_STATUS_NAMES,
+        NOT_QUALIFIED_STATUS_NAMES).
+        Args:
+            metadata (dict): {"pipelines": {id: title}, "statuses": {id: {"name", "pipeline_id"}}}.
+        Returns:
+            Classifier: Classifier covering all known pipelines and statuses.
+        """
+        category_pipelines: Dict[str, List[int]] = {
+            category: list(pipeline_ids) for category, pipeline_ids in CATEGORY_PIPELINES.items()
+        }
+        listed = {pipeline_id for pipeline_ids in category_pipelines.values() for pipeline_id in pipeline_ids}
+        for pipeline_id, title in metadata.get('pipelines', {}).items():
+            if pipeline_id in listed:
+                continue
+            title = (title or '').lower()
+            for category, keywords in CATEGORY_PIPELINE_KEYWORDS.items():
+                if any(keyword.lower() in title for keyword in keywords):
+                    category_pipelines.setdefault(category, []).append(pipeline_id)
+                    break
+
+        hot_names = {name.lower() for name in HOT_STATUS_NAMES}
+        not_qualified_names = {name.lower() for name in NOT_QUALIFIED_STATUS_NAMES}
+        hot_status_ids = set(HOT_STATUS_IDS)
+        not_qualified_status_ids = set(NOT_QUALIFIED_STATUS_IDS)
+        for status_id, status in metadata.get('statuses', {}).items():
+            name = (status.get('name') or '').lower()
+            if name in hot_names:
+                hot_status_ids.add(status_id)
+            if name in not_qualified_names:
+                not_qualified_status_ids.add(status_id)
+        return cls(category_pipelines, hot_status_ids, not_qualified_status_ids, CUSTOM_FIELD_UUIDS)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Classifier) and vars(self) == vars(other)
+
+    def category(self, pipeline_id: Any) -> Optional[str]:
+        """
+        Returns category name for a pipeline ID, or None if the pipeline is not classified.
+        """
+        return self.pipeline_categories.get(pipeline_id)
+
+    def field_flags(self, custom_fields: Iterable[Dict[str, Any]]) -> int:
+        """
+        Encode custom field values as a bitmask (the last field with a given name wins).
+        Args:
+            custom_fields (Iterable[dict]): Card custom fields.
+        Returns:
+            int: Bitmask of HOT_FIELD_BIT, QUALIFIED_FIELD_BIT and CUSTOM_KEY_BITS.
+        """
+        flags = 0
+        field_bits = self.field_bits
+        for field in custom_fields:
+            bit = field_bits.get(field.get('uuid')) or field_bits.get(field.get('name'))
+            if bit:
+                flags = flags | bit if field.get('value', False) else flags & ~bit
+        return flags
+
+    def is_hot(self, status_id: Any, flags: int) -> bool:
+        """
+        Returns True if a card counts as "Прогріті".
+        """
+        return bool(flags & HOT_FIELD_BIT) or status_id in self.hot_status_ids
+
+    def is_not_qualified(self, status_id: Any, flags: int) -> bool:
+        """
+        Returns True if a card counts as "Не кваліфіковані".
+        """
+        return not flags & QUALIFIED_FIELD_BIT or status_id in self.not_qualified_status_ids
+
+
+# Shared classifier used by analytics and tables (replaced once metadata is loaded)
+_classifier: Classifier = Classifier.from_settings()
+
+
+def get_classifier() -> Classifier:
+    """
+    Returns the shared classifier.
+    """
+    return _classifier
+
+
+def set_classifier(classifier: Classifier) -> None:
+    """
+    Replace the shared classifier, e.g. with one built from pipeline metadata.
+    """
+    global _classifier
+    _classifier = classifier
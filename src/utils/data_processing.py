@@ -1,108 +1,278 @@
-import pytz
-import requests
+import logging
 import streamlit as st
-from datetime import datetime
-from config.settings import WEBHOOK_PROD_URL
-from src.utils.analytics import build_manager_category_dict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from config.settings import (
+    ACCOUNTS, WEBHOOK_PROD_URL, ANALYTICS_MAX_AGE, CARD_INCLUDE, METADATA_CACHE_TTL, METADATA_ENABLED,
+    METRICS_PORT, PREFETCH_INTERVAL, PREFETCH_JITTER, PREFETCH_MAX_BACKOFF, PUSH_PORT, PUSH_SECRET,
+    PUSH_RECONCILE_INTERVAL
+)
+from src.core.dates import kyiv_tz, current_kyiv_date
+from src.utils.metrics import metrics, start_metrics_server
+from src.utils.scheduler import PrefetchScheduler
+from src.utils.shared_cache import AnalyticsCache
 
-kyiv_tz = pytz.timezone("Europe/Kyiv")
-today = datetime.now(kyiv_tz).strftime("%Y-%m-%d")
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+    from src.api.client import ApiClient
+    from src.api.push import PushReceiver
+    from src.utils.aggregate_store import AggregateStore
 
-def get_kyiv_date(created_at_str):
-    try:
-        dt_utc = datetime.strptime(created_at_str, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=pytz.utc)
-        dt_kyiv = dt_utc.astimezone(kyiv_tz)
-        return dt_kyiv.strftime("%Y-%m-%d")
-    except Exception:
-        return ""
+logger = logging.getLogger(__name__)
 
-def process_all_data(api_client, webhook_url: str = WEBHOOK_PROD_URL) -> None:
+# Pushed events are applied to the single account's refresh state
+PUSH_ENABLED = bool(PUSH_PORT and PUSH_SECRET) and not ACCOUNTS
+
+# Streamlit adapters of the UI-free pipeline in src/core/pipeline.py: process-wide
+# resources, spinners, messages and session_state.
+# The pipeline, the API client and the account pool are imported where they are first
+# used: they pull in pandas, numpy and requests, which the first page view of a fresh
+# server does not need.
+
+@st.cache_resource
+def get_api_client() -> "ApiClient":
+    """
+    Returns the API client (with its pooled HTTP session) shared by all sessions.
+    """
+    from src.api.client import ApiClient
+    return ApiClient()
+
+@st.cache_resource
+def get_aggregate_store() -> "AggregateStore":
+    """
+    Returns the per-day aggregate store shared by all sessions.
+    """
+    from src.utils.aggregate_store import AggregateStore
+    return AggregateStore()
+
+@st.cache_resource
+def get_account_pool() -> Optional["ProcessPoolExecutor"]:
+    """
+    Returns the process pool refreshing the KeyCRM accounts in parallel (one worker
+    per account), or None with a single account.
+    """
+    if not ACCOUNTS:
+        return None
+    from src.core.accounts import create_account_pool
+    return create_account_pool(ACCOUNTS)
+
+def compute_today(
+    api_client,
+    webhook_url: str,
+    previous: Optional[Dict[str, Any]],
+    account_pool: Optional["ProcessPoolExecutor"] = None
+) -> Dict[str, Any]:
+    """
+    Refresh today's analytics of the configured account, or of all ACCOUNTS in the
+    account pool (the API client and webhook URL of each account are used then).
+    """
+    if ACCOUNTS:
+        from src.core.accounts import compute_accounts_data
+        return compute_accounts_data(ACCOUNTS, previous, account_pool)
+    from src.core.pipeline import compute_all_data
+    return compute_all_data(api_client, webhook_url, previous)
+
+def process_range_data(api_client, start: str, end: str) -> None:
+    """
+    Build analytics for a date range and save them to Streamlit session_state.
+    Args:
+        api_client (ApiClient): KeyCRM API client.
+        start (str): First day in 'YYYY-MM-DD' format.
+        end (str): Last day in 'YYYY-MM-DD' format, inclusive.
+    Returns:
+        None
+    """
+    with st.spinner("Loading date range..."):
+        try:
+            today = None
+            if end >= current_kyiv_date():
+                # Today comes from the shared analytics cache, refreshed only if stale
+                today = get_analytics_cache().get_or_compute(
+                    analytics_cache_key(current_kyiv_date()),
+                    lambda previous: compute_today(api_client, WEBHOOK_PROD_URL, previous, get_account_pool())
+                ).value
+            if ACCOUNTS:
+                from src.core.accounts import build_accounts_range
+                range_data = build_accounts_range(ACCOUNTS, start, end, get_account_pool(), today)
+            else:
+                from src.core.pipeline import build_range_analytics
+                range_data = build_range_analytics(
+                    api_client, start, end, get_aggregate_store(),
+                    today_analytics=today['all_data']['analytics'] if today else None
+                )
+            range_data.update({'start': start, 'end': end})
+            st.session_state['range_data'] = range_data
+            for message in range_data['warnings']:
+                st.warning(f"⚠️ {message}")
+            st.success(
+                f"✅ {range_data['days']} days: {range_data['days'] - len(range_data['fetched_days'])} "
+                f"reused (stored days and today's shared result), {len(range_data['fetched_days'])} fetched"
+            )
+        except Exception as e:
+            st.error(f"❌ Error processing date range: {e}")
+
+@st.cache_resource
+def get_metadata_scheduler() -> Optional[PrefetchScheduler]:
+    """
+    Start (once per process) loading pipelines and statuses in the background, reloaded
+    once per metadata TTL (see build_classifier). Until they arrive, cards are classified
+    with the cached metadata of an earlier run (whatever its age) or the IDs from
+    settings, so no page view waits for the API.
+    Returns:
+        PrefetchScheduler or None: Running scheduler, or None if metadata is disabled.
+    """
+    if not METADATA_ENABLED:
+        return None
+    from src.api.metadata import build_classifier, load_cached_classifier
+    load_cached_classifier()
+    api_client = get_api_client()
+    return PrefetchScheduler(
+        lambda: build_classifier(api_client),
+        interval=METADATA_CACHE_TTL,
+        timezone=kyiv_tz,
+        jitter=PREFETCH_JITTER,
+        max_backoff=PREFETCH_MAX_BACKOFF,
+        first_delay=0.0
+    ).start()
+
+@st.cache_resource
+def get_metrics_server():
+    """
+    Start (once per process) the Prometheus-style /metrics endpoint if METRICS_PORT is set.
+    Returns:
+        ThreadingHTTPServer or None: Running server, or None if disabled.
+    """
+    if not METRICS_PORT:
+        return None
+    return start_metrics_server(METRICS_PORT)
+
+@st.cache_resource
+def get_analytics_cache() -> AnalyticsCache:
+    """
+    Returns the analytics cache shared by all sessions of this Streamlit process.
+    """
+    return AnalyticsCache(max_age=ANALYTICS_MAX_AGE)
+
+def analytics_cache_key(date: str) -> Tuple[str, str]:
+    """
+    Returns the shared cache key for a day's analytics.
+    """
+    return (date, CARD_INCLUDE)
+
+@st.cache_resource
+def get_prefetch_scheduler(webhook_url: str = WEBHOOK_PROD_URL) -> PrefetchScheduler:
+    """
+    Start (once per process) the background scheduler that keeps today's analytics warm
+    in the shared analytics cache, including right after midnight Kyiv time.
+    Args:
+        webhook_url (str): Webhook URL to fetch new leads.
+    Returns:
+        PrefetchScheduler: Running scheduler.
+    """
+    cache = get_analytics_cache()
+    api_client = get_api_client()
+    account_pool = get_account_pool()
+
+    def refresh() -> None:
+        if PUSH_ENABLED:
+            # Reconcile the pushed analytics with a full pull (pushed updates keep the
+            # entry fresh, so the run is never skipped)
+            cache.get_or_compute(
+                analytics_cache_key(current_kyiv_date()),
+                lambda previous: compute_today(api_client, webhook_url, None),
+                force=True
+            )
+        else:
+            # Skip the run if a session refreshed recently
+            cache.get_or_compute(
+                analytics_cache_key(current_kyiv_date()),
+                lambda previous: compute_today(api_client, webhook_url, previous, account_pool),
+                max_age=PREFETCH_INTERVAL / 2
+            )
+        metrics.log_snapshot("prefetch")
+
+    return PrefetchScheduler(
+        refresh,
+        interval=PUSH_RECONCILE_INTERVAL if PUSH_ENABLED else PREFETCH_INTERVAL,
+        timezone=kyiv_tz,
+        jitter=PREFETCH_JITTER,
+        max_backoff=PREFETCH_MAX_BACKOFF
+    ).start()
+
+@st.cache_resource
+def get_push_receiver(webhook_url: str = WEBHOOK_PROD_URL) -> Optional["PushReceiver"]:
+    """
+    Start (once per process) the receiver of pushed lead, card and call events if
+    KEYCRM_PUSH_PORT and KEYCRM_PUSH_SECRET are set. Each batch of events updates today's
+    shared analytics in place (see compute_pushed_data).
+    Args:
+        webhook_url (str): Webhook URL for a full pull when there is no result to update.
+    Returns:
+        PushReceiver or None: Running receiver, or None if disabled.
+    """
+    if not PUSH_ENABLED:
+        if PUSH_PORT:
+            logger.warning("Push receiver disabled: it needs KEYCRM_PUSH_SECRET and a single account")
+        return None
+    from src.api.push import PushReceiver
+    from src.core.pipeline import compute_pushed_data
+    cache = get_analytics_cache()
+    api_client = get_api_client()
+
+    def apply(events: List[Dict[str, Any]]) -> None:
+        applied: List[bool] = []
+
+        def compute(previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            applied.append(True)
+            return compute_pushed_data(api_client, events, previous, webhook_url)
+
+        # A refresh of the same day already in flight is waited for without running this
+        # compute: apply the events again on its result (applying events is idempotent)
+        while not applied:
+            cache.get_or_compute(analytics_cache_key(current_kyiv_date()), compute, force=True)
+
+    return PushReceiver(apply, PUSH_SECRET).start(PUSH_PORT)
+
+def process_all_data(
+    api_client,
+    webhook_url: str = WEBHOOK_PROD_URL,
+    incremental: bool = False,
+    force: bool = False
+) -> None:
     """
     Process all data: new leads from webhook + calls from KeyCRM API.
-    Saves analytics and cards to Streamlit session_state.
+    Results are shared by all sessions through the process-wide analytics cache and
+    saved to Streamlit session_state.
     Args:
         ApiClient (Type): KeyCRM API client class (default: imported ApiClient).
         webhook_url (str): Webhook URL to fetch new leads.
+        incremental (bool): Reuse the previous refresh of the same day and fetch only
+            new calls and new or changed cards.
+        force (bool): Refresh even if the shared result is not stale yet.
     Returns:
         None
     """
     with st.spinner("Loading all data..."):
         try:
-            # Fetch new leads from webhook
-            resp = requests.get(webhook_url, timeout=20)
-            resp.raise_for_status()
-            if not resp.text.strip():
-                st.warning("No new leads from webhook")
-                webhook_data = []
-                card_ids = None
-            else:
-                webhook_data = resp.json()
-                card_ids = list({item['card_id'] for item in webhook_data if 'card_id' in item})
-
-            cards_new = []
-            if card_ids:
-                    # Include custom fields and managers in card data
-                    response_new = api_client.fetch_cards_by_ids(card_ids, include="custom_fields,manager")
-                    if not response_new.get('error'):
-                        cards_new = response_new.get('data', [])
-            else:
-                cards_new = []
-
-            # Fetch calls for today
-            calls_today = api_client.fetch_all_calls(max_calls=400, date=today, include="")
-            lead_ids = [call.get('lead_id') for call in calls_today if call.get('lead_id') is not None]
-
-            # Normalize lead IDs: keep only values convertible to int
-            normalized_lead_ids = set()
-            for lid in lead_ids:
-                if lid is None:
-                    continue
-                try:
-                    # Pass an int directly or convert other values to str first to satisfy type checkers
-                    if isinstance(lid, int):
-                        normalized_lead_ids.add(lid)
-                    else:
-                        normalized_lead_ids.add(int(str(lid)))
-                except (TypeError, ValueError):
-                    continue
-            unique_lead_ids = list(normalized_lead_ids)
-
-            cards_by_leads = []
-            if unique_lead_ids:
-                response_leads = api_client.fetch_cards_by_ids(unique_lead_ids, include="custom_fields,manager")
-                if not response_leads.get('error'):
-                    cards_by_leads = response_leads.get('data', [])
-
-            # "Нові": cards created today (from webhook and calls)
-            cards_calls_new = [card for card in cards_by_leads if get_kyiv_date(card.get('created_at', '')) == today and card.get('manager_id', False)]
-            cards_new_final = cards_new + cards_calls_new
-
-            # "Попередні": cards with a call today, but not created today
-            cards_calls_final = [card for card in cards_by_leads if get_kyiv_date(card.get('created_at', '')) != today and card.get('manager_id', False)]
-
-            # Remove duplicates (if any)
-            new_ids = {card.get('id') for card in cards_new_final}
-            cards_calls_final = [card for card in cards_calls_final if card.get('id') not in new_ids]
-
-            filtered_card = {
-                "Нові": cards_new_final,
-                "Попередні": cards_calls_final
-            }
-
-            # Combine all cards into one list
-            all_cards = filtered_card["Нові"] + filtered_card["Попередні"]
-
-            # Build analytics dictionary
-            manager_dict = build_manager_category_dict(filtered_card)
+            cache = get_analytics_cache()
+            account_pool = get_account_pool()
+            computed: List[bool] = []
+
+            def compute(previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+                computed.append(True)
+                return compute_today(api_client, webhook_url, previous if incremental else None, account_pool)
+
+            entry = cache.get_or_compute(analytics_cache_key(current_kyiv_date()), compute, force=force)
+            # A result computed by another session counts as a hit of the shared cache
+            metrics.increment("analytics_cache_requests_total", result="miss" if computed else "hit")
+            if computed:
+                metrics.log_snapshot("refresh")
+            for message in entry.value['warnings']:
+                st.warning(f"⚠️ {message}")
 
             # Save to Streamlit session_state
-            st.session_state['all_data'] = {
-                'cards': all_cards,
-                'analytics': manager_dict,
-                'count': len(all_cards)
-            }
+            all_data = entry.value['all_data']
+            st.session_state['all_data'] = all_data
 
-            st.success(f"✅ Received {len(all_cards)} cards")
+            st.success(f"✅ Received {all_data['count']} cards")
         except Exception as e:
-
             st.error(f"❌ Error processing data: {e}")
@@ -0,0 +1,230 @@
+import json
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets (seconds)
+LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Numeric path segments are collapsed so that every card ID is counted as one endpoint
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def endpoint_label(url: str, base_url: str = "") -> str:
+    """
+    Returns the endpoint of a request URL for metric labels, e.g. '/pipelines/cards/{id}'.
+    """
+    path = url[len(base_url):] if base_url and url.startswith(base_url) else url
+    return _ID_SEGMENT.sub("/{id}", path.split("?", 1)[0]) or "/"
+
+
+def escape_label_value(value: Any) -> str:
+    """
+    Escape a label value for the Prometheus text format (backslash, double quote and newline).
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket bounds (Prometheus style).
+    """
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Returns the bucket bound below which a fraction q of the observations fall
+        (None if empty; inf if beyond the last bucket).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """
+    Thread-safe, process-wide registry of counters, latency histograms and the
+    duration of the last run of each pipeline stage.
+    """
+    def __init__(self) -> None:
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.last_stage_seconds: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        """
+        Increase a counter, e.g. increment("http_requests_total", endpoint="/calls").
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        """
+        Record a duration in a latency histogram.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a pipeline stage (e.g. 'webhook', 'calls', 'analytics'). The duration is
+        recorded in the stage histogram and as the stage's last duration, also when
+        the stage fails.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.observe("stage_seconds", seconds, stage=name)
+            with self.lock:
+                self.last_stage_seconds[name] = seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: {"counters": [{"name", "labels", "value"}], "histograms": [{"name",
+                "labels", "count", "sum", "p50", "p95"}], "stages": {stage: seconds}}.
+        """
+        with self.lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95)
+                }
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ]
+            stages = dict(self.last_stage_seconds)
+        return {"counters": counters, "histograms": histograms, "stages": stages}
+
+    def counter_total(self, name: str, **labels: str) -> float:
+        """
+        Returns the sum of a counter over all label values matching the given labels.
+        """
+        with self.lock:
+            return sum(
+                value for (counter, counter_labels), value in self.counters.items()
+                if counter == name and labels.items() <= dict(counter_labels).items()
+            )
+
+    def to_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        def render_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{escape_label_value(value)}"' for key, value in pairs) + "}"
+
+        lines: List[str] = []
+        with self.lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE keycrm_{name} counter")
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"keycrm_{name}{render_labels(labels)} {value:g}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE keycrm_{name} histogram")
+                for (histogram_name, labels), histogram in sorted(self.histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"keycrm_{name}_bucket{render_labels(labels, (('le', le),))} {cumulative}")
+                    lines.append(f"keycrm_{name}_sum{render_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"keycrm_{name}_count{render_labels(labels)} {histogram.count}")
+            lines.append("# TYPE keycrm_last_stage_seconds gauge")
+            for stage, seconds in sorted(self.last_stage_seconds.items()):
+                lines.append(f'keycrm_last_stage_seconds{{stage="{escape_label_value(stage)}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def log_snapshot(self, message: str = "metrics") -> None:
+        """
+        Write the current snapshot as one structured (JSON) log record at INFO level.
+        """
+        logger.info("%s %s", message, json.dumps(self.snapshot(), ensure_ascii=False, default=str))
+
+    def reset(self) -> None:
+        """
+        Drop all collected metrics.
+        """
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.last_stage_seconds.clear()
+
+
+# Process-wide metrics registry
+metrics = Metrics()
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serve the metrics in Prometheus text format on /metrics from a daemon thread.
+    Args:
+        port (int): Port to listen on.
+        host (str): Interface to bind.
+    Returns:
+        ThreadingHTTPServer: Running server (call shutdown() to stop it).
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug("metrics server: " + format, *args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,112 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta, tzinfo
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    """
+    Background thread that runs a refresh on a fixed interval and right after
+    midnight in the given timezone. Runs are jittered so that several app replicas
+    do not hit the API at the same moment, and failures back off exponentially.
+    """
+    def __init__(
+        self,
+        refresh: Callable[[], None],
+        interval: float,
+        timezone: tzinfo,
+        jitter: float = 0.1,
+        max_backoff: float = 1800.0,
+        first_delay: Optional[float] = None
+    ) -> None:
+        """
+        Initialize scheduler.
+        Args:
+            refresh (Callable): Refresh to run; raising marks the run as failed.
+            interval (float): Seconds between successful runs.
+            timezone (tzinfo): Timezone whose midnight triggers a run (day rollover).
+            jitter (float): Random spread of each delay as a fraction of the interval.
+            max_backoff (float): Upper bound of the delay after repeated failures (seconds).
+            first_delay (float, optional): Seconds before the first run (None: a random
+                part of the jitter, to spread replicas started together).
+        """
+        self.refresh = refresh
+        self.interval: float = interval
+        self.timezone = timezone
+        self.jitter: float = jitter
+        self.max_backoff: float = max_backoff
+        self.first_delay: Optional[float] = first_delay
+        self.failures: int = 0
+        self.runs: int = 0
+        self.last_run_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.next_run_at: Optional[float] = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="prefetch-scheduler", daemon=True)
+
+    def start(self) -> "PrefetchScheduler":
+        """
+        Start the background thread.
+        """
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the background thread after the current run.
+        """
+        self.stop_event.set()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: Number of runs and failures in a row, last run time, last error and next run time.
+        """
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at,
+            "last_error": self.last_error,
+            "next_run_at": self.next_run_at
+        }
+
+    def _seconds_to_midnight(self) -> float:
+        now = datetime.now(self.timezone)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        if hasattr(self.timezone, "localize"):
+            midnight = self.timezone.localize(midnight)
+        else:
+            midnight = midnight.replace(tzinfo=self.timezone)
+        return max(0.0, (midnight - now).total_seconds())
+
+    def _next_delay(self) -> float:
+        if self.failures:
+            # Exponential backoff with jitter after failed runs
+            delay = min(self.max_backoff, self.interval * 2 ** (self.failures - 1))
+            return random.uniform(delay / 2, delay)
+        delay = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        # Run right after the day rolls over, spread over a few seconds across replicas
+        return min(delay, self._seconds_to_midnight() + random.uniform(1, 1 + self.jitter * 60))
+
+    def _run(self) -> None:
+        # Spread the first run of replicas started together
+        delay = random.uniform(0, self.jitter * self.interval) if self.first_delay is None else self.first_delay
+        while True:
+            self.next_run_at = time.time() + delay
+            if self.stop_event.wait(delay):
+                return
+            try:
+                self.refresh()
+                self.failures = 0
+                self.last_error = None
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.warning("Prefetch failed (%d in a row): %s", self.failures, e)
+            self.runs += 1
+            self.last_run_at = time.time()
+            delay = self._next_delay()
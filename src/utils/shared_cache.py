@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class CacheEntry:
+    """
+    Cached value with the time it was computed and a version that grows with every
+    recomputation of the same key.
+    """
+    __slots__ = ("value", "computed_at", "version")
+
+    def __init__(self, value: Any, computed_at: float, version: int = 1) -> None:
+        self.value = value
+        self.computed_at = computed_at
+        self.version = version
+
+    @property
+    def age(self) -> float:
+        """
+        Seconds since the value was computed.
+        """
+        return time.time() - self.computed_at
+
+
+class _Flight:
+    """
+    A computation in progress that concurrent callers wait for.
+    """
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.entry: Optional[CacheEntry] = None
+        self.error: Optional[BaseException] = None
+
+
+class AnalyticsCache:
+    """
+    Process-wide cache of computed analytics shared by all Streamlit sessions.
+    Concurrent refreshes of the same key share one in-flight computation (single flight).
+    """
+    def __init__(self, max_age: float, max_entries: int = 4) -> None:
+        """
+        Initialize analytics cache.
+        Args:
+            max_age (float): Seconds after which a cached value is considered stale.
+            max_entries (int): Maximum number of cached keys (oldest are evicted).
+        """
+        self.max_age: float = max_age
+        self.max_entries: int = max_entries
+        self.entries: Dict[Hashable, CacheEntry] = {}
+        self.flights: Dict[Hashable, _Flight] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Returns the cached entry for a key (fresh or stale), or None.
+        """
+        with self.lock:
+            return self.entries.get(key)
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[Optional[Any]], Any],
+        force: bool = False,
+        max_age: Optional[float] = None
+    ) -> CacheEntry:
+        """
+        Return a fresh cached value, or compute it once for all concurrent callers.
+        Args:
+            key (Hashable): Cache key, e.g. (date, include).
+            compute (Callable): Computes the new value from the previous one (None if absent).
+            force (bool): Recompute even if the cached value is fresh.
+            max_age (float, optional): Staleness window for this call (defaults to the cache's).
+        Returns:
+            CacheEntry: Cached or newly computed entry.
+        Raises:
+            Exception: Whatever compute raised; the entry is dropped so the next
+                refresh starts from scratch.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and not force and entry.age < (self.max_age if max_age is None else max_age):
+                return entry
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+
+        if not leader:
+            # Another session is already refreshing this key: wait for its result
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.entry
+
+        try:
+            value = compute(entry.value if entry is not None else None)
+            flight.entry = CacheEntry(value, time.time(), entry.version + 1 if entry is not None else 1)
+            with self.lock:
+                self.entries[key] = flight.entry
+                while len(self.entries) > self.max_entries:
+                    oldest = min(self.entries, key=lambda k: self.entries[k].computed_at)
+                    del self.entries[oldest]
+            return flight.entry
+        except BaseException as e:
+            flight.error = e
+            with self.lock:
+                self.entries.pop(key, None)
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Drop one cached key, or all keys if key is None.
+        """
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
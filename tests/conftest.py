@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+# Settings are read at import: keep tests offline, uncached and out of the repository's .cache
+os.environ["KEYCRM_CACHE_DIR"] = tempfile.mkdtemp(prefix="keycrm-tests-")
+os.environ["KEYCRM_CARD_CACHE"] = "0"
+os.environ["KEYCRM_METADATA"] = "0"
+os.environ["KEYCRM_PREFETCH"] = "0"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+from benchmarks.data import generate_dataset
+from benchmarks.run import make_client
+from benchmarks.stub_server import StubKeyCRM
+from src.api.client import ApiClient
+from src.core.dates import current_kyiv_date
+
+
+@pytest.fixture
+def dataset() -> Dict[str, Any]:
+    """
+    A small synthetic day of cards and calls.
+    """
+    return generate_dataset(current_kyiv_date(), 300, 600, seed=7)
+
+
+@pytest.fixture
+def stub(dataset: Dict[str, Any]) -> Iterator[StubKeyCRM]:
+    """
+    Local KeyCRM stub serving the dataset.
+    """
+    server = StubKeyCRM(dataset).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def new_client(stub: StubKeyCRM) -> Callable[[], ApiClient]:
+    """
+    Factory of unthrottled clients of the stub, each with its own rate limit.
+    """
+    return lambda: make_client(stub, 1e6, 1000)
+
+
+@pytest.fixture
+def webhook_url(stub: StubKeyCRM) -> Callable[[], str]:
+    """
+    Factory of webhook URLs that do not share the cached webhook client (and its ETag).
+    """
+    return lambda: f"{stub.url}/webhook?run={uuid.uuid4().hex}"
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.data import generate_dataset
+from benchmarks.run import make_client
+from benchmarks.stub_server import StubKeyCRM
+from src.core.dates import current_kyiv_date
+from src.core.pipeline import build_range_analytics
+from src.utils.aggregate_store import AggregateStore
+from src.utils.analytics import NOT_QUALIFIED_LABEL, empty_category_stats
+
+
+def manager_stats(**values):
+    stats = empty_category_stats()
+    for key, value in values.items():
+        if isinstance(value, dict):
+            stats[key].update(value)
+        else:
+            stats[key] = value
+    return stats
+
+
+def test_days_round_trip(tmp_path):
+    store = AggregateStore(str(tmp_path))
+    day = {
+        "Олена": {
+            "Консультація": manager_stats(**{"Нові": {"Прогріті": 2}, "Попередні": {"Не прогріті": 1}}),
+            "Ремонт": manager_stats(**{"Нові": {"Не прогріті": 3}})
+        },
+        "Без менеджера": {"Консультація": manager_stats(**{"Попередні": {"Прогріті": 4}})}
+    }
+    store.put_day("2026-01-14", day)
+    store.put_day("2026-01-15", {})
+
+    assert store.get_days(["2026-01-13", "2026-01-14", "2026-01-15"]) == {
+        "2026-01-14": day,
+        "2026-01-15": {}
+    }
+    assert sorted(store.stored_days(["2026-01-13", "2026-01-14", "2026-01-15"])) == ["2026-01-14", "2026-01-15"]
+
+
+def test_put_day_replaces_the_day(tmp_path):
+    store = AggregateStore(str(tmp_path))
+    store.put_day("2026-01-14", {"Олена": {"Ремонт": manager_stats(**{"Нові": {"Прогріті": 1}})}})
+    replacement = {"Ігор": {"Ремонт": manager_stats(**{"Попередні": {"Прогріті": 5}})}}
+    store.put_day("2026-01-14", replacement)
+    assert store.get_days(["2026-01-14"]) == {"2026-01-14": replacement}
+
+
+@pytest.fixture
+def past_day():
+    return (datetime.strptime(current_kyiv_date(), "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+@pytest.fixture
+def past_dataset(past_day):
+    return generate_dataset(past_day, 300, 600, seed=7)
+
+
+@pytest.fixture
+def past_stub(past_dataset):
+    server = StubKeyCRM(past_dataset).start()
+    yield server
+    server.stop()
+
+
+def test_day_with_missing_cards_is_not_stored(tmp_path, past_day, past_dataset, past_stub):
+    store = AggregateStore(str(tmp_path))
+    missing = next(call["lead_id"] for call in past_dataset["calls"] if call["lead_id"])
+    card = past_dataset["cards"].pop(missing)
+    past_stub.data_changed()
+
+    first = build_range_analytics(make_client(past_stub, 1e6, 1000), past_day, past_day, store)
+    assert first["fetched_days"] == [past_day]
+    assert any("not stored" in warning for warning in first["warnings"])
+    assert store.stored_days([past_day]) == []
+
+    past_dataset["cards"][missing] = card
+    past_stub.data_changed()
+    second = build_range_analytics(make_client(past_stub, 1e6, 1000), past_day, past_day, store)
+    assert second["fetched_days"] == [past_day]
+    assert store.stored_days([past_day]) == [past_day]
+
+    past_stub.reset_counts()
+    third = build_range_analytics(make_client(past_stub, 1e6, 1000), past_day, past_day, store)
+    assert third["fetched_days"] == []
+    assert not sum(past_stub.requests.values())
+    assert third["analytics"] == second["analytics"]
+
+
+def test_days_stored_with_the_old_not_qualified_key_are_renamed(tmp_path):
+    store = AggregateStore(str(tmp_path))
+    store.put_day("2026-01-14", {"Олена": {"Ремонт": {"Не квалифіковані": 3}}})
+    stats = AggregateStore(str(tmp_path)).get_days(["2026-01-14"])["2026-01-14"]["Олена"]["Ремонт"]
+    assert stats == manager_stats(**{NOT_QUALIFIED_LABEL: 3})
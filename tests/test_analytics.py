@@ -0,0 +1,102 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from benchmarks.data import generate_dataset
+from config.settings import (
+    CATEGORY_PIPELINES, HOT_STATUS_IDS, NOT_QUALIFIED_STATUS_IDS,
+    HOT_FIELD_NAME, QUALIFIED_FIELD_NAME, CUSTOM_KEYS
+)
+from src.utils.analytics import (
+    NOT_QUALIFIED_LABEL, add_card_to_dict, build_manager_category_dict, build_manager_table_frame
+)
+from src.utils.cards import Card
+
+
+def reference_manager_category_dict(cards: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    The original per-card build of the analytics from raw card payloads.
+    """
+    categories = {pipeline_id: category for category, ids in CATEGORY_PIPELINES.items() for pipeline_id in ids}
+    result: Dict[str, Any] = {}
+    for state, card_list in cards.items():
+        for card in card_list:
+            manager = card.get('manager') or {}
+            status_id = card.get('status_id')
+            manager_key = f"{manager.get('first_name', 'N/A')} {manager.get('last_name', 'N/A')}"
+            category = categories.get(card.get('pipeline_id'))
+            if not category:
+                continue
+            hot_contact = False
+            qualified = False
+            custom_values = {key: False for key in CUSTOM_KEYS}
+            for field in card.get('custom_fields', []):
+                if field.get('name') == HOT_FIELD_NAME:
+                    hot_contact = field.get('value', False)
+                if field.get('name') == QUALIFIED_FIELD_NAME:
+                    qualified = field.get('value', False)
+                if field.get('name') in CUSTOM_KEYS:
+                    custom_values[field.get('name')] = field.get('value', False)
+            prog = "Прогріті" if hot_contact or status_id in HOT_STATUS_IDS else "Не прогріті"
+            stats = result.setdefault(manager_key, {}).setdefault(category, {
+                "Нові": {"Прогріті": 0, "Не прогріті": 0},
+                "Попередні": {"Прогріті": 0, "Не прогріті": 0},
+                NOT_QUALIFIED_LABEL: 0,
+                **{key: 0 for key in CUSTOM_KEYS}
+            })
+            stats[state][prog] += 1
+            for key in CUSTOM_KEYS:
+                if custom_values[key]:
+                    stats[key] += 1
+            if not qualified or status_id in NOT_QUALIFIED_STATUS_IDS:
+                stats[NOT_QUALIFIED_LABEL] += 1
+    return result
+
+
+@pytest.fixture(scope="module")
+def raw_cards() -> Dict[str, List[Dict[str, Any]]]:
+    cards = list(generate_dataset("2026-01-15", 2800, 10, seed=11)["cards"].values())
+    # Cards outside the categories or without a pipeline are not counted
+    cards[0] = {**cards[0], "pipeline_id": 99}
+    cards[1] = {**cards[1], "pipeline_id": None}
+    return {"Нові": cards[:900], "Попередні": cards[900:]}
+
+
+def test_matches_the_original_build(raw_cards):
+    expected = reference_manager_category_dict(raw_cards)
+    parsed = {state: [Card.from_api(card) for card in cards] for state, cards in raw_cards.items()}
+
+    for cards in (raw_cards, parsed):
+        result = build_manager_category_dict(cards)
+        assert result == expected
+        # Same manager and category order, and plain ints
+        assert [(manager, list(categories)) for manager, categories in result.items()] == \
+            [(manager, list(categories)) for manager, categories in expected.items()]
+        assert all(
+            type(value) is int
+            for categories in result.values()
+            for stats in categories.values()
+            for value in stats.values() if not isinstance(value, dict)
+        )
+
+
+def test_matches_the_incremental_fold(raw_cards):
+    folded: Dict[str, Any] = {}
+    for state, cards in raw_cards.items():
+        for card in cards:
+            add_card_to_dict(folded, state, card)
+    assert build_manager_category_dict(raw_cards) == folded
+
+
+def test_no_classified_cards():
+    assert build_manager_category_dict({"Нові": [], "Попередні": []}) == {}
+    assert build_manager_category_dict({"Нові": [{"id": 1, "pipeline_id": 99}]}) == {}
+
+
+def test_table_shows_not_qualified_counts(raw_cards):
+    analytics = build_manager_category_dict(raw_cards)
+    table = build_manager_table_frame(analytics)
+    manager, categories = next(iter(analytics.items()))
+    category, stats = next(iter(categories.items()))
+    assert stats[NOT_QUALIFIED_LABEL] > 0
+    assert table.loc[(manager, category), (NOT_QUALIFIED_LABEL, "")] == stats[NOT_QUALIFIED_LABEL]
@@ -0,0 +1,66 @@
+import types
+import pytest
+import src.api.cache as cache_module
+from src.api.cache import CardCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Controllable replacement of time.time() in the cache module.
+    """
+    clock = types.SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(cache_module, "time", types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def card(card_id, updated_at="2026-01-15 10:00:00", **fields):
+    return {"id": card_id, "updated_at": updated_at, **fields}
+
+
+def test_round_trip_by_include(tmp_path, clock):
+    cache = CardCache(str(tmp_path), ttl=60, max_entries=10)
+    cache.put_many([card(1, title="a"), card(2, title="b")], include="contact")
+    assert cache.get_many([1, 2, 3], include="contact") == {
+        1: card(1, title="a"), 2: card(2, title="b")
+    }
+    assert cache.get_many([1, 2]) == {}
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = CardCache(str(tmp_path), ttl=60, max_entries=10)
+    cache.put_many([card(1)])
+    clock.now += 60
+    assert cache.get_many([1]) == {1: card(1)}
+    clock.now += 1
+    assert cache.get_many([1]) == {}
+    # Expired entries are dropped at the next eviction
+    cache.put_many([card(2)])
+    clock.now -= 61
+    assert cache.get_many([1, 2]) == {2: card(2)}
+
+
+def test_older_payload_does_not_replace_newer(tmp_path, clock):
+    cache = CardCache(str(tmp_path), ttl=60, max_entries=10)
+    cache.put_many([card(1, "2026-01-15 12:00:00", title="new")])
+    cache.put_many([card(1, "2026-01-15 11:00:00", title="old")])
+    assert cache.get_many([1])[1]['title'] == "new"
+    # An equal 'updated_at' replaces the entry (and refreshes its TTL)
+    clock.now += 50
+    cache.put_many([card(1, "2026-01-15 12:00:00", title="same")])
+    clock.now += 50
+    assert cache.get_many([1])[1]['title'] == "same"
+    cache.put_many([card(1, "2026-01-15 13:00:00", title="newer")])
+    assert cache.get_many([1])[1]['title'] == "newer"
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = CardCache(str(tmp_path), ttl=3600, max_entries=3)
+    for card_id in (1, 2, 3):
+        cache.put_many([card(card_id)])
+        clock.now += 1
+    # Reading card 1 makes card 2 the least recently used one
+    cache.get_many([1])
+    clock.now += 1
+    cache.put_many([card(4)])
+    assert set(cache.get_many([1, 2, 3, 4])) == {1, 3, 4}
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+import requests
+
+from benchmarks.run import make_client
+from benchmarks.stub_server import StubKeyCRM
+from src.api import client as client_module
+
+MAX_RETRIES = 3
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(client_module, "MAX_RETRIES", MAX_RETRIES)
+    monkeypatch.setattr(client_module, "RETRY_BACKOFF_BASE", 0.001)
+
+
+def serve(dataset, **options) -> StubKeyCRM:
+    return StubKeyCRM(dataset, **options).start()
+
+
+def test_server_errors_are_retried_until_success(dataset, monkeypatch):
+    monkeypatch.setattr(client_module, "MAX_RETRIES", 20)
+    stub = serve(dataset, error_rate=0.5, seed=3)
+    try:
+        api_client = make_client(stub, 0, 1)
+        card = api_client.fetch_card(1)
+        requests_sent = stub.requests["/pipelines/cards/{id}"]
+    finally:
+        stub.stop()
+    assert card["id"] == 1
+    assert requests_sent > 1
+    assert api_client.stats.snapshot() == {
+        "requests": requests_sent, "throttled": 0, "retried": requests_sent - 1, "failed": 0
+    }
+
+
+def test_raises_after_max_retries(dataset):
+    stub = serve(dataset, error_rate=1.0)
+    try:
+        api_client = make_client(stub, 0, 1)
+        with pytest.raises(requests.exceptions.HTTPError) as error:
+            api_client.fetch_card(1)
+        requests_sent = stub.requests["/pipelines/cards/{id}"]
+    finally:
+        stub.stop()
+    assert error.value.response.status_code in (500, 502, 503)
+    assert requests_sent == MAX_RETRIES + 1
+    assert api_client.stats.snapshot() == {
+        "requests": MAX_RETRIES + 1, "throttled": 0, "retried": MAX_RETRIES, "failed": 1
+    }
+
+
+def test_other_client_errors_are_not_retried(stub):
+    api_client = make_client(stub, 0, 1)
+    with pytest.raises(requests.exceptions.HTTPError) as error:
+        api_client.fetch_card(10 ** 9)
+    assert error.value.response.status_code == 404
+    assert stub.requests["/pipelines/cards/{id}"] == 1
+    assert api_client.stats.snapshot() == {"requests": 1, "throttled": 0, "retried": 0, "failed": 1}
+
+
+def test_retry_after_pauses_the_shared_bucket(dataset):
+    # 60 requests per minute with a burst of 10: the 11th request gets 429 with Retry-After: 1
+    stub = serve(dataset, rate_limit_per_minute=60)
+    try:
+        api_client = make_client(stub, 0, 1)
+        started = time.perf_counter()
+        for card_id in range(1, 12):
+            assert api_client.fetch_card(card_id)["id"] == card_id
+        elapsed = time.perf_counter() - started
+    finally:
+        stub.stop()
+    stats = api_client.stats.snapshot()
+    assert elapsed >= 1.0
+    assert stats["throttled"] >= 1
+    assert stats["retried"] >= 1
+    assert stats["failed"] == 0
+    assert stats["requests"] == 11 + stats["retried"]
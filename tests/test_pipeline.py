@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from benchmarks.run import add_new_calls
+from src.core.dates import current_kyiv_date
+from src.core.pipeline import compute_all_data
+
+
+def assert_same_analytics(incremental, full):
+    assert incremental["all_data"]["analytics"] == full["all_data"]["analytics"]
+    assert incremental["all_data"]["count"] == full["all_data"]["count"]
+    assert len(incremental["all_data"]["card_table"]) == len(full["all_data"]["card_table"])
+
+
+def test_incremental_refresh_matches_full_refresh(dataset, stub, new_client, webhook_url):
+    client = new_client()
+    first = compute_all_data(client, webhook_url())
+    add_new_calls(dataset, current_kyiv_date(), 25, seed=1)
+    stub.data_changed()
+    stub.reset_counts()
+
+    incremental = compute_all_data(client, webhook_url(), first)
+    incremental_requests = sum(stub.requests.values())
+    full = compute_all_data(new_client(), webhook_url())
+
+    assert_same_analytics(incremental, full)
+    assert incremental_requests < sum(stub.requests.values()) - incremental_requests
+
+
+def test_late_call_before_high_water_mark_is_counted(dataset, stub, new_client, webhook_url):
+    client = new_client()
+    first = compute_all_data(client, webhook_url())
+    # A call logged late, with a time a few minutes before the newest call already seen
+    late_at = (
+        datetime.strptime(first["state"]["last_call_at"], "%Y-%m-%d %H:%M:%S") - timedelta(minutes=2)
+    ).strftime("%Y-%m-%d %H:%M:%S")
+    late_lead = next(card_id for card_id in dataset["cards"] if card_id not in first["state"]["lead_ids"])
+    dataset["calls"].append({"id": len(dataset["calls"]) + 1, "lead_id": late_lead, "created_at": late_at, "duration": 30})
+    dataset["cards"][late_lead]["updated_at"] = late_at
+    stub.data_changed()
+
+    incremental = compute_all_data(client, webhook_url(), first)
+    full = compute_all_data(new_client(), webhook_url())
+
+    assert late_lead in incremental["state"]["lead_ids"]
+    assert_same_analytics(incremental, full)
+
+
+def test_failed_card_fetch_is_retried(dataset, stub, new_client, webhook_url):
+    webhook_ids = {lead["card_id"] for lead in dataset["webhook"]}
+    missing = next(
+        call["lead_id"] for call in dataset["calls"]
+        if call["lead_id"] and call["lead_id"] not in webhook_ids
+    )
+    card = dataset["cards"].pop(missing)
+    stub.data_changed()
+    client = new_client()
+    first = compute_all_data(client, webhook_url())
+    assert missing in first["state"]["pending_ids"]
+    assert first["warnings"]
+
+    dataset["cards"][missing] = card
+    stub.data_changed()
+    incremental = compute_all_data(client, webhook_url(), first)
+    full = compute_all_data(new_client(), webhook_url())
+
+    assert not incremental["state"]["pending_ids"]
+    assert_same_analytics(incremental, full)
@@ -0,0 +1,54 @@
+import http.client
+import time
+
+import pytest
+
+from src.api.push import PushReceiver, parse_events
+
+
+@pytest.fixture
+def receiver():
+    batches = []
+    server = PushReceiver(batches.append, "sécret", batch_delay=0.01).start(0, "127.0.0.1")
+    server.batches = batches
+    yield server
+    server.stop()
+
+
+def post(receiver, secret, body=b'[{"type": "lead", "data": {"card_id": 1}}]'):
+    connection = http.client.HTTPConnection("127.0.0.1", receiver.server.server_port, timeout=5)
+    connection.putrequest("POST", "/events")
+    if secret is not None:
+        connection.putheader("X-Webhook-Secret", secret)
+    connection.putheader("Content-Length", str(len(body)))
+    connection.endheaders(body)
+    status = connection.getresponse().status
+    connection.close()
+    return status
+
+
+@pytest.mark.parametrize("secret", [None, b"", b"secret", b"s\xe9cret", b"\xff\xfe\xfd"])
+def test_wrong_secret_is_rejected(receiver, secret):
+    assert post(receiver, secret) == 403
+    time.sleep(0.05)
+    assert receiver.batches == []
+
+
+def test_events_with_the_secret_are_applied(receiver):
+    assert post(receiver, "sécret".encode("utf-8")) == 202
+    deadline = time.monotonic() + 5
+    while not receiver.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert receiver.batches == [[{"type": "lead", "data": {"card_id": 1}}]]
+
+
+def test_invalid_body_is_rejected(receiver):
+    assert post(receiver, "sécret".encode("utf-8"), b'[{"type": "deal", "data": {}}]') == 400
+
+
+def test_keycrm_webhooks_are_classified():
+    events = parse_events([
+        {"event": "lead.created", "context": {"id": 1}},
+        {"event": "call.created", "context": {"id": 2}}
+    ])
+    assert [event["type"] for event in events] == ["card", "call"]
@@ -0,0 +1,38 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from src.api.rate_limit import TokenBucket, parse_retry_after
+
+
+def test_burst_then_throttled():
+    bucket = TokenBucket(rate_per_minute=600, burst=2)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    # 10 requests per second: the third one waits for a token
+    assert bucket.acquire() == pytest.approx(0.1, abs=0.05)
+
+
+@pytest.mark.parametrize("rate", [0, -1])
+def test_zero_rate_is_unlimited(rate):
+    bucket = TokenBucket(rate_per_minute=rate, burst=1)
+    started = time.perf_counter()
+    assert all(bucket.acquire() == 0.0 for _ in range(1000))
+    assert time.perf_counter() - started < 1
+
+
+@pytest.mark.parametrize("rate", [0, 6000])
+def test_pause_holds_back_requests(rate):
+    bucket = TokenBucket(rate_per_minute=rate, burst=10)
+    bucket.pause(0.2)
+    assert bucket.acquire() == pytest.approx(0.2, abs=0.05)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(formatdate(time.time() + 60, usegmt=True)) == pytest.approx(60, abs=2)
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
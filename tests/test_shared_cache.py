@@ -0,0 +1,69 @@
+import threading
+import time
+
+from src.utils.shared_cache import AnalyticsCache
+
+
+def test_concurrent_callers_share_one_computation():
+    cache = AnalyticsCache(max_age=60)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute(previous):
+        calls.append(previous)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute("today", compute)))
+    leader.start()
+    assert started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("today", compute, force=True)))
+        for _ in range(4)
+    ]
+    for follower in followers:
+        follower.start()
+    # Forced refreshes join the computation in flight instead of starting their own
+    time.sleep(0.2)
+    assert results == []
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert calls == [None]
+    assert len(results) == 5
+    assert all(entry is results[0] for entry in results)
+
+
+def test_fresh_entry_is_reused_unless_forced():
+    cache = AnalyticsCache(max_age=60)
+    calls = []
+
+    def compute(previous):
+        calls.append(previous)
+        return len(calls)
+
+    first = cache.get_or_compute("today", compute)
+    assert cache.get_or_compute("today", compute) is first
+    forced = cache.get_or_compute("today", compute, force=True)
+    assert calls == [None, 1]
+    assert (forced.value, forced.version) == (2, 2)
+    stale = cache.get_or_compute("today", compute, max_age=0)
+    assert stale.value == 3
+
+
+def test_failed_computation_drops_the_entry():
+    cache = AnalyticsCache(max_age=60)
+    cache.get_or_compute("today", lambda previous: "value")
+
+    def fail(previous):
+        raise RuntimeError("refresh failed")
+
+    try:
+        cache.get_or_compute("today", fail, force=True)
+    except RuntimeError:
+        pass
+    assert cache.get("today") is None
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from src.api.webhook import iter_json_items
+
+
+def chunked(body: bytes, size: int):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    ([b"[1.", b"5]"], [1.5]),
+    ([b"[1e", b"5]"], [1e5]),
+    ([b"[1", b"2, 3]"], [12, 3]),
+    ([b"[-", b"0.5E-", b"2 ,tr", b"ue, nu", b"ll]"], [-0.005, True, None]),
+    ([b'{"card_id"', b": 7}"], [{"card_id": 7}]),
+    ([b"  ", b"[]"], []),
+])
+def test_items_split_across_chunks(chunks, expected):
+    assert list(iter_json_items(chunks)) == expected
+
+
+def test_every_chunk_size_gives_the_same_items():
+    items = [{"card_id": i, "title": "Лід №%d" % i, "score": i * 1.25e-3} for i in range(40)] + [12.5e3, -7, "x"]
+    body = json.dumps(items, ensure_ascii=False).encode("utf-8")
+    for size in range(1, 12):
+        assert list(iter_json_items(chunked(body, size))) == items
+
+
+@pytest.mark.parametrize("chunks", [[b"[1,", b" 2"], [b"[1.x]"], [b'"text"']])
+def test_invalid_body_raises(chunks):
+    with pytest.raises(ValueError):
+        list(iter_json_items(chunks))